@@ -6,9 +6,11 @@ subsystem (dispatch/orchestrator/formatters) while the refactor proceeds.
 
 from __future__ import annotations
 
+import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any, Dict, List, Literal, TypedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Literal, TypedDict
 
 try:
     # Python 3.11+
@@ -52,12 +54,55 @@ class ToolSchema(TypedDict):
 class ExecSummary:
     """Summary returned by the tool-loop executor."""
 
+    # Explicit slots (dataclass(slots=True) needs 3.10; we support 3.9)
+    __slots__ = ("steps", "last")
+
     steps: int
     last: str
 
+    def __reduce__(self) -> tuple[type[ExecSummary], tuple[int, str]]:
+        # Frozen + manual slots can't restore state via setattr; rebuild instead
+        return (ExecSummary, (self.steps, self.last))
+
+
+# Tool results only count as "recent" within this many trailing messages
+RECENT_TOOL_WINDOW = 3
+
+
+def is_tool_result(msg: dict[str, Any]) -> bool:
+    """Return True if a chat message carries a tool execution result."""
+    if msg.get("role") == "tool":
+        return True
+    content = msg.get("content", "")
+    return "wrote " in content or "OK (code" in content
+
+
+class MessageLog(List[Dict[str, Any]]):
+    """Message list whose append/extend remember the newest tool result."""
 
+    def __init__(self, messages: Iterable[dict[str, Any]] = ()) -> None:
+        super().__init__()
+        self._last_tool_index = -1
+        self.extend(messages)
+
+    def append(self, msg: dict[str, Any]) -> None:
+        if is_tool_result(msg):
+            self._last_tool_index = len(self)
+        super().append(msg)
+
+    def extend(self, messages: Iterable[dict[str, Any]]) -> None:
+        for msg in messages:
+            self.append(msg)
+
+    @property
+    def has_recent_tool_results(self) -> bool:
+        """True if a tool result is among the last RECENT_TOOL_WINDOW messages."""
+        return self._last_tool_index >= 0 and len(self) - self._last_tool_index <= RECENT_TOOL_WINDOW
+
+
+@lru_cache(maxsize=1)
 def get_tool_schema() -> list[ToolSchema]:
-    """Return tool schema objects used by formatters/backends."""
+    """Return the shared tool schema list; callers must not mutate it."""
 
     # Local import to avoid circular dependency (tools imports ToolSchema).
     from .tools import get_tool_schemas
@@ -69,6 +114,11 @@ def get_tool_schema() -> list[ToolSchema]:
 # Security helpers expected by dispatch.py
 # ---------------------------------------------------------------------------
 
+# Built once at import; both sanitizers run on every dispatched tool call
+_INVALID_PATH_CHARS = frozenset(";|&$`<>")
+_BANNED_CMD_RE = re.compile(r";|&&|\|\||\||`|\$\(|>|<")
+_DANGEROUS_CMD_RE = re.compile(r"rm -rf|eval |exec ", re.IGNORECASE)
+
 def sanitize_path(path: str) -> str:
     """Validate/sanitize a filesystem path.
 
@@ -86,8 +136,7 @@ def sanitize_path(path: str) -> str:
         raise ValueError("Invalid path")
     
     # Check for invalid characters
-    invalid_chars = [";", "|", "&", "$", "`", "<", ">"]
-    if any(char in p for char in invalid_chars):
+    if not _INVALID_PATH_CHARS.isdisjoint(p):
         raise ValueError("invalid characters")
 
     return p
@@ -104,13 +153,11 @@ def sanitize_command(cmd: str) -> str:
 
     c = cmd.strip().replace("\x00", "")
 
-    banned = [";", "&&", "||", "|", "`", "$(", ">", "<"]
-    if any(tok in c for tok in banned):
+    if _BANNED_CMD_RE.search(c):
         raise ValueError("dangerous pattern")
     
     # Check for dangerous commands
-    dangerous_cmds = ["rm -rf", "eval ", "exec "]
-    if any(cmd in c.lower() for cmd in dangerous_cmds):
+    if _DANGEROUS_CMD_RE.search(c):
         raise ValueError("dangerous pattern")
 
     return c
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import json
+from collections import OrderedDict
 from typing import Any
 
 from .base import sanitize_command, sanitize_path
@@ -16,6 +17,23 @@ except ImportError:
     StreamingReporter = Any  # type: ignore
     QuietReporter = Any  # type: ignore
 
+# Upper bound on tracked retry keys; keys embed step/args so they never repeat
+MAX_RETRY_KEYS = 256
+
+
+class RetryCounts(OrderedDict[str, int]):
+    """Retry counters that evict the least recently updated key past a cap."""
+
+    def __init__(self, maxlen: int = MAX_RETRY_KEYS) -> None:
+        super().__init__()
+        self.maxlen = maxlen
+
+    def __setitem__(self, key: str, value: int) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxlen:
+            self.popitem(last=False)
+
 
 class ToolDispatcher:
     """Secure dispatcher for tool execution with validation."""
@@ -27,7 +45,20 @@ class ToolDispatcher:
             reporter: Optional reporter for streaming updates
         """
         self.reporter = reporter
-        self._retry_counts: dict[str, int] = {}
+        self._retry_counts: RetryCounts = RetryCounts()
+
+    def with_reporter(self, reporter: Any) -> ToolDispatcher:
+        """Return a dispatcher sharing these retry counts but another reporter.
+        
+        Args:
+            reporter: Reporter for the returned dispatcher
+            
+        Returns:
+            New ToolDispatcher reporting to reporter
+        """
+        dispatcher = ToolDispatcher(reporter)
+        dispatcher._retry_counts = self._retry_counts
+        return dispatcher
 
     def dispatch(
         self,
@@ -4,10 +4,115 @@ from __future__ import annotations
 import json
 import re
 from abc import ABC, abstractmethod
-from typing import Any
+from functools import lru_cache
+from typing import Any, cast
 
 from .base import ToolCall, ToolSchema
 
+try:
+    # orjson is optional; its JSONDecodeError subclasses json.JSONDecodeError
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover
+    from json import loads as _json_loads  # type: ignore[assignment]
+
+# Tool-call extraction patterns, compiled once; extract_calls runs per LLM turn
+_QWEN_CALL_RE = re.compile(r"<tool_call>\s*({.*?})\s*</tool_call>", re.DOTALL)
+_PHI_ARRAY_START_RE = re.compile(r"@?\s*\[")
+_JSON_DECODER = json.JSONDecoder()
+
+# Escape sequences honoured inside quoted Granite4 argument values
+_GRANITE_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\", '"': '"', "'": "'"}
+
+
+def _is_ident_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _scan_granite_args(content: str, pos: int) -> tuple[dict[str, Any] | None, int]:
+    """Scan ``key="value", ...)]`` starting just after the opening paren.
+
+    Returns:
+        Parsed arguments and the index just past the closing ``)]``, or -1
+        if the input ends before the call is closed. A malformed call cut
+        short by another ``[`` yields None and the index of that ``[``.
+    """
+    arguments: dict[str, Any] = {}
+    n = len(content)
+    while pos < n:
+        ch = content[pos]
+        if ch in " \t\r\n,":
+            pos += 1
+            continue
+        if content.startswith(")]", pos):
+            return arguments, pos + 2
+
+        start = pos
+        while pos < n and _is_ident_char(content[pos]):
+            pos += 1
+        key = content[start:pos]
+        while pos < n and content[pos] in " \t":
+            pos += 1
+        if not key or pos >= n or content[pos] != "=":
+            # Malformed argument list: keep what parsed if ")]" closes it,
+            # but don't resync past a "[" that may open the next call
+            close = content.find(")]", pos)
+            bracket = content.find("[", pos)
+            if bracket != -1 and (close == -1 or bracket < close):
+                return None, bracket
+            return arguments, (close + 2 if close != -1 else -1)
+        pos += 1
+        while pos < n and content[pos] in " \t":
+            pos += 1
+
+        if pos < n and content[pos] in "\"'":
+            quote = content[pos]
+            pos += 1
+            buf: list[str] = []
+            while pos < n and content[pos] != quote:
+                if content[pos] == "\\" and pos + 1 < n:
+                    nxt = content[pos + 1]
+                    buf.append(_GRANITE_ESCAPES.get(nxt, "\\" + nxt))
+                    pos += 2
+                else:
+                    buf.append(content[pos])
+                    pos += 1
+            if pos >= n:
+                return arguments, -1
+            pos += 1
+            arguments[key] = "".join(buf)
+        else:
+            start = pos
+            while pos < n and content[pos] not in " \t\r\n,)":
+                pos += 1
+            arguments[key] = content[start:pos]
+    return arguments, -1
+
+
+def _scan_granite_calls(content: str) -> list[tuple[str, dict[str, Any]]]:
+    """Single-pass scanner for Granite4 ``[name(key="value", ...)]`` calls.
+
+    Linear in the input length, and quoted values may contain ``)``, ``]``,
+    commas and escaped quotes, which a lazy regex would cut short.
+    """
+    calls: list[tuple[str, dict[str, Any]]] = []
+    n = len(content)
+    i = content.find("[")
+    while i != -1:
+        j = i + 1
+        while j < n and _is_ident_char(content[j]):
+            j += 1
+        if j == i + 1 or j >= n or content[j] != "(":
+            i = content.find("[", i + 1)
+            continue
+        arguments, end = _scan_granite_args(content, j + 1)
+        if end == -1:
+            # Ran off the end of the input; nothing after can close a call
+            break
+        if arguments is not None:
+            calls.append((content[i + 1:j], arguments))
+        i = content.find("[", end)
+    return calls
+
 
 class ModelToolFormatter(ABC):
     """Abstract base for model-specific tool formatting."""
@@ -60,12 +165,11 @@ class Qwen3Formatter(ModelToolFormatter):
     def extract_calls(self, content: str) -> list[ToolCall]:
         """Extract tool calls from Qwen3's <tool_call> tags."""
         tool_calls: list[ToolCall] = []
-        pattern = r"<tool_call>\s*({.*?})\s*</tool_call>"
-        matches = re.findall(pattern, content, re.DOTALL)
+        matches = _QWEN_CALL_RE.findall(content)
 
         for match in matches:
             try:
-                tool_data = json.loads(match)
+                tool_data = _json_loads(match)
                 tool_calls.append({
                     "function": {
                         "name": tool_data.get("name", ""),
@@ -114,14 +218,26 @@ class Phi4Formatter(ModelToolFormatter):
     def extract_calls(self, content: str) -> list[ToolCall]:
         """Extract tool calls from Phi-4's <|tool_call|> format."""
         tool_calls: list[ToolCall] = []
-        pattern = r"<\|tool_call\|>@?\s*\[\s*({.*?})\s*\]"
-        matches = re.findall(pattern, content, re.DOTALL)
+        marker = "<|tool_call|>"
+        pos = content.find(marker)
 
-        for match in matches:
+        while pos != -1:
+            start = _PHI_ARRAY_START_RE.match(content, pos + len(marker))
+            pos = content.find(marker, pos + len(marker))
+            if not start:
+                continue
+            # Decode the whole [...] payload in one pass; raw_decode stops at
+            # the end of the array, so trailing text is ignored
             try:
-                tool_data = json.loads(match)
+                payload, _ = _JSON_DECODER.raw_decode(content, start.end() - 1)
+            except json.JSONDecodeError:
+                continue
+
+            for tool_data in payload:
+                if not isinstance(tool_data, dict):
+                    continue
                 if "function" in tool_data:
-                    tool_calls.append(tool_data)
+                    tool_calls.append(cast(ToolCall, tool_data))
                 else:
                     tool_calls.append({
                         "function": {
@@ -129,8 +245,6 @@ class Phi4Formatter(ModelToolFormatter):
                             "arguments": tool_data.get("arguments", {}),
                         }
                     })
-            except json.JSONDecodeError:
-                continue
 
         return tool_calls
 
@@ -167,33 +281,10 @@ class Granite4Formatter(ModelToolFormatter):
 
     def extract_calls(self, content: str) -> list[ToolCall]:
         """Extract tool calls from Granite4's bracket notation."""
-        tool_calls: list[ToolCall] = []
-        pattern = r'\[(\w+)\((.*?)\)\]'
-        matches = re.findall(pattern, content)
-
-        for func_name, args_str in matches:
-            try:
-                arguments: dict[str, Any] = {}
-                if args_str.strip():
-                    # Handle quoted parameters correctly
-                    arg_pattern = r'(\w+)\s*=\s*(?:"([^"\\]*(?:\\.[^"\\]*)*)"|\'([^\'\\]*(?:\\.[^\'\\]*)*)\'|([^\s,]+))'
-                    arg_matches = re.findall(arg_pattern, args_str.strip())
-                    for param, quoted_value1, quoted_value2, unquoted_value in arg_matches:
-                        value = quoted_value1 or quoted_value2 or unquoted_value
-                        # Strip any remaining quotes
-                        value = value.strip('\'"')
-                        arguments[param] = value
-
-                tool_calls.append({
-                    "function": {
-                        "name": func_name,
-                        "arguments": arguments,
-                    }
-                })
-            except Exception as e:
-                continue
-
-        return tool_calls
+        return [
+            {"function": {"name": name, "arguments": arguments}}
+            for name, arguments in _scan_granite_calls(content)
+        ]
 
     def get_system_prompt(self, tools_description: str) -> str:
         """Get Granite4-specific system prompt."""
@@ -219,42 +310,28 @@ class StandardFormatter(ModelToolFormatter):
         return json.dumps(tools, indent=2)
 
     def extract_calls(self, content: str) -> list[ToolCall]:
-        """Extract JSON tool calls from content."""
-        tool_calls: list[ToolCall] = []
-        json_content = content.strip()
-
-        # Remove markdown code fences
-        if json_content.startswith("```json"):
-            json_content = json_content[7:]
-        elif json_content.startswith("```"):
-            json_content = json_content[3:]
-        if json_content.endswith("```"):
-            json_content = json_content[:-3]
-        json_content = json_content.strip()
-
-        if json_content.startswith('{"name":'):
-            brace_count = 0
-            for i, char in enumerate(json_content):
-                if char == "{":
-                    brace_count += 1
-                elif char == "}":
-                    brace_count -= 1
-                    if brace_count == 0:
-                        json_obj = json_content[: i + 1]
-                        try:
-                            tool_data = json.loads(json_obj)
-                            if "name" in tool_data and "arguments" in tool_data:
-                                tool_calls.append({
-                                    "function": {
-                                        "name": tool_data["name"],
-                        "arguments": tool_data["arguments"],
-                                    }
-                                })
-                        except json.JSONDecodeError:
-                            pass
-                        break
-
-        return tool_calls
+        """Extract JSON tool calls from content.
+        
+        Decodes the first JSON object in the text, so markdown fences or
+        other prefixes before the opening brace are skipped without any
+        fence stripping.
+        """
+        start = content.find("{")
+        if start == -1:
+            return []
+        try:
+            tool_data, _ = _JSON_DECODER.raw_decode(content, start)
+        except json.JSONDecodeError:
+            return []
+
+        if not isinstance(tool_data, dict) or "name" not in tool_data or "arguments" not in tool_data:
+            return []
+        return [{
+            "function": {
+                "name": tool_data["name"],
+                "arguments": tool_data["arguments"],
+            }
+        }]
 
     def get_system_prompt(self, tools_description: str) -> str:
         """Get standard system prompt."""
@@ -268,22 +345,36 @@ class StandardFormatter(ModelToolFormatter):
         )
 
 
+# Model-name markers checked in order against the lowercased model name
+_MODEL_FORMATTERS: tuple[tuple[str, type[ModelToolFormatter]], ...] = (
+    ("qwen3", Qwen3Formatter),
+    ("qwen-3", Qwen3Formatter),
+    ("phi4", Phi4Formatter),
+    ("phi-4", Phi4Formatter),
+    ("granite4", Granite4Formatter),
+    ("granite-4", Granite4Formatter),
+)
+
+
 def get_formatter(model_name: str) -> ModelToolFormatter:
     """Get appropriate formatter for model.
     
+    Formatters are stateless, so one shared instance is returned per
+    (case-insensitive) model name.
+    
     Args:
         model_name: Name of the model
         
     Returns:
         Appropriate ModelToolFormatter instance
     """
-    model_lower = model_name.lower()
-    
-    if "qwen3" in model_lower or "qwen-3" in model_lower:
-        return Qwen3Formatter()
-    elif "phi4" in model_lower or "phi-4" in model_lower:
-        return Phi4Formatter()
-    elif "granite4" in model_lower or "granite-4" in model_lower:
-        return Granite4Formatter()
-    else:
-        return StandardFormatter()
+    return _formatter_for(model_name.lower())
+
+
+@lru_cache(maxsize=8)
+def _formatter_for(model_lower: str) -> ModelToolFormatter:
+    """Build the formatter for an already-lowercased model name."""
+    for marker, formatter_cls in _MODEL_FORMATTERS:
+        if marker in model_lower:
+            return formatter_cls()
+    return StandardFormatter()
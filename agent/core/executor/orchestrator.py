@@ -2,9 +2,10 @@
 from __future__ import annotations
 
 import json
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable
 
-from .base import ExecSummary, get_tool_schema
+from .base import RECENT_TOOL_WINDOW, ExecSummary, MessageLog, ToolCall, get_tool_schema, is_tool_result
 from .dispatch import ToolDispatcher
 from .formatters import get_formatter
 from ..config import Settings, load_settings
@@ -16,6 +17,10 @@ except ImportError:
     StreamingReporter = Any  # type: ignore
     QuietReporter = Any  # type: ignore
 
+# Side-effect-free tools whose calls within one turn may run concurrently
+PARALLEL_SAFE_TOOLS = frozenset({"fs_read", "fs_list"})
+MAX_PARALLEL_CALLS = 8
+
 
 def execute(
     coder_prompt: str,
@@ -48,10 +53,10 @@ def execute(
     use_api_tools = isinstance(formatter.__class__.__name__, str) and \
                     formatter.__class__.__name__ == "StandardFormatter"
     
-    messages: list[dict[str, Any]] = [
+    messages = MessageLog([
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": coder_prompt},
-    ]
+    ])
     
     print(f"[DEBUG] Using backend: {settings.backend}")
     print(f"[DEBUG] Using model: {settings.coder_model}")
@@ -112,22 +117,8 @@ def execute(
         
         # Execute tool calls
         error_occurred = False
-        for call in calls:
-            fn_data = call.get("function", {})
-            fn_name = fn_data.get("name", "")
-            raw_args = fn_data.get("arguments", "{}")
-            
-            # Parse arguments if string
-            try:
-                if isinstance(raw_args, dict):
-                    args = raw_args
-                else:
-                    args = json.loads(raw_args) if isinstance(raw_args, str) else raw_args
-            except json.JSONDecodeError:
-                args = {}
-            
-            # Dispatch tool
-            result = dispatcher.dispatch(fn_name, args)
+        parsed_calls = [_parse_call(call) for call in calls]
+        for (fn_name, args), result in zip(parsed_calls, _dispatch_calls(dispatcher, parsed_calls)):
             messages.append({"role": "tool", "content": result, "name": fn_name})
             
             # Handle errors with retry logic
@@ -150,8 +141,81 @@ def execute(
     return ExecSummary(steps=steps, last=last_text)
 
 
+def _parse_call(call: ToolCall) -> tuple[str, dict[str, Any]]:
+    """Split a tool call into its name and parsed arguments."""
+    fn_data = call.get("function", {})
+    fn_name = fn_data.get("name", "")
+    raw_args = fn_data.get("arguments", "{}")
+    
+    # Parse arguments if string
+    try:
+        if isinstance(raw_args, dict):
+            args = raw_args
+        else:
+            args = json.loads(raw_args) if isinstance(raw_args, str) else raw_args
+    except json.JSONDecodeError:
+        args = {}
+    return fn_name, args
+
+
+class _BufferedReporter:
+    """Reporter stand-in that records callbacks for later, in-order replay.
+    
+    Worker threads report into one buffer per call, so parallel calls never
+    interleave their tool-start and tool-result lines.
+    """
+
+    def __init__(self) -> None:
+        self.events: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+
+    def __getattr__(self, method: str) -> Callable[..., None]:
+        def record(*args: Any, **kwargs: Any) -> None:
+            self.events.append((method, args, kwargs))
+        return record
+
+    def replay(self, reporter: Any) -> None:
+        """Forward the recorded callbacks to reporter."""
+        for method, args, kwargs in self.events:
+            getattr(reporter, method)(*args, **kwargs)
+
+
+def _dispatch_calls(
+    dispatcher: ToolDispatcher,
+    parsed_calls: list[tuple[str, dict[str, Any]]],
+) -> Iterable[str]:
+    """Dispatch tool calls, returning results in call order.
+    
+    When a turn holds several calls and all of them are read-only, they run
+    concurrently on a thread pool; their reporter callbacks are buffered and
+    replayed on the calling thread in call order. Otherwise calls run lazily
+    one at a time, so anything after a failing call is never executed.
+    
+    Args:
+        dispatcher: Dispatcher used to run each call
+        parsed_calls: (tool name, arguments) pairs in model order
+        
+    Returns:
+        Result strings in the same order as parsed_calls
+    """
+    if len(parsed_calls) > 1 and all(name in PARALLEL_SAFE_TOOLS for name, _ in parsed_calls):
+        reporter = dispatcher.reporter
+        buffers = [_BufferedReporter() for _ in parsed_calls]
+        workers = min(len(parsed_calls), MAX_PARALLEL_CALLS)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for (name, args), buffer in zip(parsed_calls, buffers):
+                worker = dispatcher.with_reporter(buffer) if reporter else dispatcher
+                futures.append(pool.submit(worker.dispatch, name, args))
+        results = [future.result() for future in futures]
+        if reporter:
+            for buffer in buffers:
+                buffer.replay(reporter)
+        return results
+    return (dispatcher.dispatch(name, args) for name, args in parsed_calls)
+
+
 def _has_tool_results(messages: list[dict[str, Any]]) -> bool:
-    """Check if messages contain tool execution results.
+    """Check if the last few messages contain tool execution results.
     
     Args:
         messages: Message history
@@ -159,10 +223,8 @@ def _has_tool_results(messages: list[dict[str, Any]]) -> bool:
     Returns:
         True if tool results found
     """
-    for msg in messages[-3:]:
-        if msg.get("role") == "tool":
-            return True
-        content = msg.get("content", "")
-        if "wrote " in content or "OK (code" in content:
-            return True
-    return False
+    if isinstance(messages, MessageLog):
+        return messages.has_recent_tool_results
+    # Plain lists: newest-first over the trailing window, without slicing a copy
+    stop = max(len(messages) - RECENT_TOOL_WINDOW, 0)
+    return any(is_tool_result(messages[i]) for i in range(len(messages) - 1, stop - 1, -1))
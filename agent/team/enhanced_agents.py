@@ -16,9 +16,9 @@ from ..core.config import load_settings
 class RAGPlannerAgent(RAGEnhancedAgent, Agent):
     """RAG-enhanced planning agent."""
     
-    def __init__(self, name: str = "rag-planner"):
+    def __init__(self, name: str = "rag-planner", rag_kb: Optional[RAGKnowledgeBase] = None):
         Agent.__init__(self, name, "planner")
-        RAGEnhancedAgent.__init__(self, name, "planner")
+        RAGEnhancedAgent.__init__(self, name, "planner", rag_kb)
         self.settings = load_settings()
     
     def process_task(self, task: Task) -> AgentResult:
@@ -109,9 +109,9 @@ class RAGPlannerAgent(RAGEnhancedAgent, Agent):
 class RAGCoderAgent(RAGEnhancedAgent, Agent):
     """RAG-enhanced coding agent."""
     
-    def __init__(self, name: str = "rag-coder"):
+    def __init__(self, name: str = "rag-coder", rag_kb: Optional[RAGKnowledgeBase] = None):
         Agent.__init__(self, name, "coder")
-        RAGEnhancedAgent.__init__(self, name, "coder")
+        RAGEnhancedAgent.__init__(self, name, "coder", rag_kb)
         self.settings = load_settings()
     
     def process_task(self, task: Task) -> AgentResult:
@@ -284,9 +284,9 @@ class RAGCoderAgent(RAGEnhancedAgent, Agent):
 class RAGReviewerAgent(RAGEnhancedAgent, Agent):
     """RAG-enhanced code review agent."""
     
-    def __init__(self, name: str = "rag-reviewer"):
+    def __init__(self, name: str = "rag-reviewer", rag_kb: Optional[RAGKnowledgeBase] = None):
         Agent.__init__(self, name, "reviewer")
-        RAGEnhancedAgent.__init__(self, name, "reviewer")
+        RAGEnhancedAgent.__init__(self, name, "reviewer", rag_kb)
     
     def process_task(self, task: Task) -> AgentResult:
         """Enhanced code review using RAG knowledge."""
@@ -453,10 +453,10 @@ def demo_enhanced_agents():
     # Initialize RAG knowledge base
     rag_kb = RAGKnowledgeBase()
     
-    # Create RAG-enhanced agents
-    planner = RAGPlannerAgent("rag-planner")
-    coder = RAGCoderAgent("rag-coder")
-    reviewer = RAGReviewerAgent("rag-reviewer")
+    # Create RAG-enhanced agents sharing one knowledge base (and embedder)
+    planner = RAGPlannerAgent("rag-planner", rag_kb)
+    coder = RAGCoderAgent("rag-coder", rag_kb)
+    reviewer = RAGReviewerAgent("rag-reviewer", rag_kb)
     
     print("✅ RAG-enhanced agents initialized")
     print(f"📊 Knowledge base contains {len(rag_kb.retrieve_relevant('', limit=100))} chunks")
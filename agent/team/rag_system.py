@@ -6,14 +6,70 @@ Provides context and knowledge base access for smaller models.
 from __future__ import annotations
 import json
 import hashlib
+import logging
+import heapq
 import sqlite3
 import os
 import re
+import threading
 from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
+from types import ModuleType
+from functools import cached_property, lru_cache
+import importlib.util
 import time
 
+try:
+    import faiss  # type: ignore[import-not-found]
+except ImportError:
+    # Optional: without FAISS, dense retrieval uses a numpy _EmbeddingMatrix
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+# Tokenizers/filters used on every embed, query and learned experience
+_WORD_RE = re.compile(r'\b\w+\b')
+_IDENT_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_STOP_WORDS = frozenset({"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by"})
+
+# Switch the FAISS index to IVF-PQ once there are enough vectors to train it
+PQ_MIN_CHUNKS = 256
+PQ_NLIST = 64
+PQ_M = 16
+PQ_NBITS = 8
+PQ_NPROBE = 8
+
+# Characters of content kept in KnowledgeChunk.preview
+PREVIEW_LENGTH = 120
+
+_INSERT_CHUNK_SQL = """
+    INSERT OR REPLACE INTO knowledge_chunks
+    (id, content, source, chunk_type, keywords, embedding, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Texts per sentence-transformer forward pass when embedding chunks in bulk
+EMBED_BATCH_SIZE = 32
+
+# Built-in knowledge: content lives in BUILTIN_KNOWLEDGE_DIR/<id>.txt
+BUILTIN_KNOWLEDGE_DIR = Path(__file__).parent / "data" / "builtin_knowledge"
+BUILTIN_CHUNK_INFO: List[Tuple[str, str, List[str]]] = [
+    ("python-best-practices", "documentation",
+     ["python", "best", "practices", "pep8", "docstring", "type", "hints"]),
+    ("common-patterns", "pattern",
+     ["singleton", "factory", "decorator", "pattern", "design"]),
+    ("error-handling", "code",
+     ["error", "exception", "handling", "try", "catch", "validation"]),
+    ("testing-patterns", "code",
+     ["testing", "unittest", "pytest", "fixture", "assert", "mock"]),
+    ("algorithms", "code",
+     ["algorithm", "binary", "search", "fibonacci", "recursive", "iterative"]),
+]
+
+# Distinct search queries whose dense embeddings are kept per SemanticEmbedding
+QUERY_CACHE_SIZE = 1024
+
 
 @dataclass
 class KnowledgeChunk:
@@ -25,46 +81,178 @@ class KnowledgeChunk:
     keywords: List[str]
     embedding_hash: Optional[str] = None
     created_at: float = None
+    # Whitespace-collapsed start of content for display, computed once
+    preview: str = field(init=False, repr=False, compare=False)
     
     def __post_init__(self):
         if self.created_at is None:
             self.created_at = time.time()
+        self.preview = " ".join(self.content.split())[:PREVIEW_LENGTH]
+
+
+def _normalize_rows(np: ModuleType, vectors: Any) -> None:
+    """L2-normalize the rows of a 2-D float array in place."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.maximum(norms, 1e-12)
+
+
+class _EmbeddingMatrix:
+    """Growable (N, D) float32 matrix of normalized embeddings.
+
+    Numpy stand-in for a flat FAISS inner-product index (same ``ntotal``,
+    ``add`` and ``search``), so scoring a query is one matrix-vector product.
+    """
+    
+    def __init__(self, np: ModuleType, dim: int, capacity: int = 64) -> None:
+        self.np = np
+        self._data = np.empty((capacity, dim), dtype="float32")
+        self.ntotal = 0
+    
+    def add(self, vectors: Any) -> None:
+        needed = self.ntotal + len(vectors)
+        if needed > len(self._data):
+            # Double the capacity so appends are amortized O(1)
+            grown = self.np.empty((max(needed, 2 * len(self._data)), self._data.shape[1]), dtype="float32")
+            grown[:self.ntotal] = self._data[:self.ntotal]
+            self._data = grown
+        self._data[self.ntotal:needed] = vectors
+        self.ntotal = needed
+    
+    def search(self, queries: Any, k: int) -> Tuple[Any, Any]:
+        scores = self._data[:self.ntotal] @ queries[0]
+        if k < self.ntotal:
+            # O(N) selection of the top k, then sort only those
+            positions = self.np.argpartition(-scores, k)[:k]
+            positions = positions[self.np.argsort(-scores[positions], kind="stable")]
+        else:
+            positions = self.np.argsort(-scores, kind="stable")
+        return scores[positions][None, :], positions[None, :]
+
+
+class _TokenIndex:
+    """Inverted index over TF-IDF document weights: token -> [(row, weight)].
+
+    Same ``ntotal``/``add``/``search`` surface as _EmbeddingMatrix, but a
+    query only walks the postings of its own tokens instead of looking each
+    token up in every stored document.
+    """
+    
+    def __init__(self) -> None:
+        self._postings: Dict[str, List[Tuple[int, float]]] = {}
+        self.ntotal = 0
+    
+    def add(self, docs: List[Dict[str, float]]) -> None:
+        for doc in docs:
+            for token, weight in doc.items():
+                self._postings.setdefault(token, []).append((self.ntotal, weight))
+            self.ntotal += 1
+    
+    def search(self, query_tokens: List[str], k: int) -> Tuple[List[List[float]], List[List[int]]]:
+        scores = [0.0] * self.ntotal
+        for token in query_tokens:
+            for row, weight in self._postings.get(token, ()):
+                scores[row] += weight
+        if query_tokens:
+            # Same average as SemanticEmbedding._score_tokens
+            scores = [score / len(query_tokens) for score in scores]
+        # Stable on ties, so equal scores keep storage order like the scan
+        positions = heapq.nlargest(k, range(self.ntotal), key=scores.__getitem__)
+        return [[scores[pos] for pos in positions]], [positions]
 
 
 class SemanticEmbedding:
     """Semantic embedding system using sentence transformers."""
     
     def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
-        try:
-            from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        # Only probe for the package here; importing it pulls in torch, so
+        # that and the model itself wait until something is embedded
+        self.dense = importlib.util.find_spec("sentence_transformers") is not None
+        if self.dense:
             import numpy as np
-            self.model = SentenceTransformer(model_name)
             self.np = np
-        except ImportError:
+            # Agents re-ask the same queries; embed each one only once
+            self._query_embeddings = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._encode_query)
+        else:
             # Fallback to TF-IDF if sentence-transformers not available
-            self.model = None
-            self.vocab: Dict[str, int] = {}
-            self.doc_freq: Dict[str, int] = {}
-            self.total_docs = 0
+            self._init_tfidf()
+    
+    def _init_tfidf(self) -> None:
+        """Reset the corpus statistics of the TF-IDF fallback."""
+        self.vocab: Dict[str, int] = {}
+        self.doc_freq: Dict[str, int] = {}
+        self.total_docs = 0
+    
+    @cached_property
+    def model(self) -> Any:
+        """Sentence-transformer model, loaded on first use (None for TF-IDF).
+
+        A package that is installed but fails to import switches this
+        embedding to the TF-IDF fallback.
+        """
+        if not self.dense:
+            return None
+        try:
+            from sentence_transformers import SentenceTransformer
+        except (ImportError, OSError) as e:
+            logger.warning("sentence-transformers failed to import (%s); using TF-IDF", e)
+            self.dense = False
+            self._init_tfidf()
+            return None
+        return SentenceTransformer(self.model_name)
     
     def get_embedding(self, text: str):
         """Get semantic embedding for text."""
-        if self.model:
+        if self.dense and self.model is not None:
             return self.model.encode(text, convert_to_tensor=False)
         else:
             # Fallback TF-IDF
             return self._get_tfidf_embedding(text)
     
+    def get_embeddings(self, texts: List[str]) -> List[Any]:
+        """Get embeddings for several texts, batching the model call."""
+        if self.dense and self.model is not None:
+            return list(self.model.encode(texts, batch_size=EMBED_BATCH_SIZE, convert_to_tensor=False))
+        else:
+            return [self._get_tfidf_embedding(text) for text in texts]
+    
+    def get_query_embedding(self, query: str) -> Any:
+        """Get the dense embedding for a search query, memoized per query."""
+        return self._query_embeddings(query.strip())
+    
+    def _encode_query(self, query: str) -> Any:
+        embedding = self.model.encode(query, convert_to_tensor=False)
+        embedding.setflags(write=False)  # shared by every cache hit
+        return embedding
+    
     def get_similarity(self, query: str, doc_embedding) -> float:
         """Calculate similarity between query and document."""
-        if self.model:
-            query_embedding = self.model.encode(query, convert_to_tensor=False)
+        if self.dense and self.model is not None:
+            query_embedding = self.get_query_embedding(query)
             return float(self.np.dot(query_embedding, doc_embedding) / 
                         (self.np.linalg.norm(query_embedding) * self.np.linalg.norm(doc_embedding)))
         else:
             # Fallback TF-IDF similarity
             return self._get_tfidf_similarity(query, doc_embedding)
     
+    def matches(self, embedding: Any) -> bool:
+        """Whether a stored (JSON-decoded) embedding was made in this mode."""
+        return isinstance(embedding, list) if self.dense else isinstance(embedding, dict)
+    
+    def get_similarities(self, query: str, doc_embeddings: List[Any]) -> List[float]:
+        """Score one query against many documents, embedding the query once."""
+        if not doc_embeddings:
+            return []
+        if self.dense and self.model is not None:
+            query_embedding = self.get_query_embedding(query)
+            docs = self.np.asarray(doc_embeddings, dtype=float)
+            norms = self.np.linalg.norm(docs, axis=1) * self.np.linalg.norm(query_embedding)
+            scores: List[float] = (docs @ query_embedding / norms).tolist()
+            return scores
+        else:
+            query_tokens = self._tokenize(query)
+            return [self._score_tokens(query_tokens, doc) for doc in doc_embeddings]
+    
     def _get_tfidf_embedding(self, text: str) -> Dict[str, float]:
         """Fallback TF-IDF embedding."""
         tokens = self._tokenize(text)
@@ -92,8 +280,10 @@ class SemanticEmbedding:
     
     def _get_tfidf_similarity(self, query: str, doc_scores: Dict[str, float]) -> float:
         """Fallback TF-IDF similarity."""
-        query_tokens = self._tokenize(query)
-        
+        return self._score_tokens(self._tokenize(query), doc_scores)
+    
+    def _score_tokens(self, query_tokens: List[str], doc_scores: Dict[str, float]) -> float:
+        """Average TF-IDF weight of the query tokens within a document."""
         if not query_tokens:
             return 0.0
         
@@ -106,23 +296,55 @@ class SemanticEmbedding:
     
     def _tokenize(self, text: str) -> List[str]:
         """Simple tokenization for fallback."""
-        tokens = re.findall(r'\b\w+\b', text.lower())
-        code_tokens = re.findall(r'[A-Za-z_][A-Za-z0-9_]*', text)
+        tokens = _WORD_RE.findall(text.lower())
+        code_tokens = _IDENT_RE.findall(text)
         return list(set(tokens + [t.lower() for t in code_tokens]))
 
 
 class RAGKnowledgeBase:
-    """Lightweight knowledge base with retrieval capabilities."""
+    """Lightweight knowledge base with retrieval capabilities.
+
+    Instances may be shared across threads: the connection and the in-memory
+    index are guarded by one lock. Use as a context manager, or call close(),
+    to release the connection.
+    """
     
     def __init__(self, db_path: str = "rag_knowledge.db"):
         self.db_path = db_path
+        # One long-lived connection: sqlite3 caches prepared statements per
+        # connection, and WAL lets writes skip most fsyncs. _lock serializes
+        # its use, so any thread may call in
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
         self.embedding = SemanticEmbedding()
+        # Dense vector index (FAISS or _EmbeddingMatrix) plus per-row columns:
+        # row i is chunk _index_ids[i] of type _index_types[i]
+        self._index: Optional[Any] = None
+        # PRAGMA data_version and embedding mode when the index was last built
+        self._index_version: Optional[int] = None
+        self._index_dense: Optional[bool] = None
+        self._index_ids: List[str] = []
+        self._index_types: List[str] = []
         self._init_db()
+        self._init_index()
         self._load_builtin_knowledge()
     
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+    
+    def __enter__(self) -> RAGKnowledgeBase:
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+    
     def _init_db(self):
         """Initialize SQLite database."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS knowledge_chunks (
                     id TEXT PRIMARY KEY,
@@ -141,42 +363,170 @@ class RAGKnowledgeBase:
                 CREATE INDEX IF NOT EXISTS idx_type ON knowledge_chunks(chunk_type)
             """)
     
+    def _init_index(self) -> None:
+        """Build the in-memory retrieval index from stored embeddings.
+
+        Dense embeddings go into a vector index, L2-normalized once here so
+        inner product equals cosine; TF-IDF embeddings go into a _TokenIndex.
+        Rows embedded in the other mode (or at another dimension) are kept
+        as empty entries that always score 0.0.
+        """
+        with self._lock, self._conn as conn:
+            # Read before the rows: a commit in between only causes a rebuild
+            self._index_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            rows = conn.execute("SELECT id, chunk_type, embedding FROM knowledge_chunks").fetchall()
+        self._index_dense = self.embedding.dense
+        
+        embeddings = [json.loads(row[2]) for row in rows]
+        usable = [self.embedding.matches(embedding) for embedding in embeddings]
+        if self.embedding.dense and any(usable):
+            dim = len(embeddings[usable.index(True)])
+            usable = [ok and len(embedding) == dim for ok, embedding in zip(usable, embeddings)]
+        
+        if not any(usable):
+            # Built on the first usable add, so an empty base never loads the
+            # model; until then retrieve_relevant scans the table
+            self._index = None
+            self._index_ids = []
+            self._index_types = []
+            return
+        
+        if not all(usable):
+            logger.warning("%d stored chunk(s) were embedded differently and will score 0.0",
+                           usable.count(False))
+        
+        self._index_ids = [row[0] for row in rows]
+        self._index_types = [row[1] for row in rows]
+        
+        if not self.embedding.dense:
+            self._index = _TokenIndex()
+            self._index.add([embedding if ok else {} for ok, embedding in zip(usable, embeddings)])
+            return
+        
+        vectors = self.embedding.np.zeros((len(rows), dim), dtype="float32")
+        for i, (ok, embedding) in enumerate(zip(usable, embeddings)):
+            if ok:
+                vectors[i] = embedding
+        _normalize_rows(self.embedding.np, vectors)
+        
+        if faiss is None:
+            self._index = _EmbeddingMatrix(self.embedding.np, dim)
+        elif len(rows) >= PQ_MIN_CHUNKS and dim % PQ_M == 0:
+            # Large bases store PQ codes (m bytes/vector) instead of float32
+            self._index_quantizer = faiss.IndexFlatIP(dim)
+            pq_index: Any = faiss.IndexIVFPQ(
+                self._index_quantizer, dim, PQ_NLIST, PQ_M, PQ_NBITS,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+            pq_index.train(vectors)
+            pq_index.nprobe = PQ_NPROBE
+            self._index = pq_index
+        else:
+            self._index = faiss.IndexFlatIP(dim)
+        
+        self._index.add(vectors)
+    
+    def _sync_index(self) -> None:
+        """Rebuild the index if another connection committed since it was built.
+
+        data_version only changes for commits made through other
+        connections, e.g. another RAGKnowledgeBase on the same file. The
+        index is also rebuilt if the embedding fell back to TF-IDF since.
+        """
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._index_version or self._index_dense != self.embedding.dense:
+                self._init_index()
+    
+    def _index_add(self, chunks: List[KnowledgeChunk], embeddings: List[Any]) -> None:
+        """Append chunk embeddings to the retrieval index."""
+        if self._index is None:
+            # The chunks are already stored, so building picks them up
+            self._init_index()
+            return
+        if self.embedding.dense:
+            vectors = self.embedding.np.array(embeddings, dtype="float32")
+            _normalize_rows(self.embedding.np, vectors)
+            self._index.add(vectors)
+        else:
+            self._index.add(embeddings)
+        self._index_ids.extend(chunk.id for chunk in chunks)
+        self._index_types.extend(chunk.chunk_type for chunk in chunks)
+    
     def add_knowledge(self, chunk: KnowledgeChunk) -> str:
         """Add knowledge chunk to the database."""
-        # Calculate semantic embedding
-        embedding = self.embedding.get_embedding(chunk.content)
+        return self.add_knowledge_batch([chunk])[0]
+    
+    def add_knowledge_batch(self, chunks: List[KnowledgeChunk]) -> List[str]:
+        """Add several knowledge chunks with one embedding call and one transaction."""
+        if not chunks:
+            return []
         
-        # Convert embedding to JSON-serializable format
-        if hasattr(embedding, 'tolist'):
-            embedding_data = embedding.tolist()
-        else:
-            embedding_data = embedding
+        chunk_ids = [chunk.id for chunk in chunks]
+        # One lock for embedding (TF-IDF updates shared corpus stats), the
+        # insert and the index update, so readers never see them half done
+        with self._lock:
+            # Calculate semantic embeddings
+            embeddings = self.embedding.get_embeddings([chunk.content for chunk in chunks])
+            
+            rows = []
+            for chunk, embedding in zip(chunks, embeddings):
+                # Convert embedding to JSON-serializable format
+                if hasattr(embedding, 'tolist'):
+                    embedding_data = embedding.tolist()
+                else:
+                    embedding_data = embedding
+            
+                rows.append((
+                    chunk.id,
+                    chunk.content,
+                    chunk.source,
+                    chunk.chunk_type,
+                    json.dumps(chunk.keywords),
+                    json.dumps(embedding_data),
+                    chunk.created_at
+                ))
+            
+            with self._conn as conn:
+                conn.executemany(_INSERT_CHUNK_SQL, rows)
+            
+            indexed = len(self._index_ids)
+            replaces = len(set(chunk_ids)) < len(chunk_ids) or not set(chunk_ids).isdisjoint(self._index_ids)
+            crosses_pq = self.embedding.dense and indexed < PQ_MIN_CHUNKS <= indexed + len(chunks)
+            changed_mode = self._index_dense != self.embedding.dense
+            if self._index is None or replaces or crosses_pq or changed_mode:
+                # (Re)build from the DB: the first add creates the index,
+                # indexes can't update in place, reaching PQ_MIN_CHUNKS
+                # switches to a trained PQ index, and a failed model import
+                # switches to TF-IDF
+                self._init_index()
+            else:
+                self._index_add(chunks, embeddings)
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO knowledge_chunks
-                (id, content, source, chunk_type, keywords, embedding, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                chunk.id,
-                chunk.content,
-                chunk.source,
-                chunk.chunk_type,
-                json.dumps(chunk.keywords),
-                json.dumps(embedding_data),
-                chunk.created_at
-            ))
-        
-        return chunk.id
+        return chunk_ids
     
     def retrieve_relevant(self, query: str, 
                          chunk_types: Optional[List[str]] = None,
                          limit: int = 5) -> List[Tuple[KnowledgeChunk, float]]:
-        """Retrieve most relevant knowledge chunks."""
-        with sqlite3.connect(self.db_path) as conn:
+        """Retrieve most relevant knowledge chunks.
+
+        An empty query only lists chunks (in storage order, scored 0.0)
+        without embedding or scoring anything.
+        """
+        listing_only = not query.strip()
+        with self._lock:
+            if not listing_only:
+                # Settle the embedding mode (loading the model), then pick up
+                # chunks other instances on this file have added
+                self.embedding.model
+                self._sync_index()
+            if self._index is not None and not listing_only:
+                return self._retrieve_from_index(query, chunk_types, limit)
+        
+        with self._lock, self._conn as conn:
             # Base query
             sql = "SELECT * FROM knowledge_chunks"
-            params = []
+            params: List[Any] = []
             
             # Filter by chunk type if specified
             if chunk_types:
@@ -184,13 +534,15 @@ class RAGKnowledgeBase:
                 sql += f" WHERE chunk_type IN ({placeholders})"
                 params.extend(chunk_types)
             
+            if listing_only:
+                sql += " LIMIT ?"
+                params.append(max(limit, 0))
+            
             cursor = conn.execute(sql, params)
             rows = cursor.fetchall()
         
-        # Calculate relevance scores
-        scored_chunks = []
-        for row in rows:
-            chunk = KnowledgeChunk(
+        chunks = [
+            KnowledgeChunk(
                 id=row[0],
                 content=row[1],
                 source=row[2],
@@ -198,192 +550,103 @@ class RAGKnowledgeBase:
                 keywords=json.loads(row[4]),
                 created_at=row[6]
             )
-            
-            embedding_data = json.loads(row[5])
-            relevance = self.embedding.get_similarity(query, embedding_data)
-            
-            scored_chunks.append((chunk, relevance))
+            for row in rows
+        ]
         
-        # Sort by relevance and return top results
-        scored_chunks.sort(key=lambda x: x[1], reverse=True)
-        return scored_chunks[:limit]
+        if listing_only:
+            return [(chunk, 0.0) for chunk in chunks]
+        
+        # Score every chunk in one batch so the query is embedded only once;
+        # rows embedded in the other mode score 0.0
+        embeddings = [json.loads(row[5]) for row in rows]
+        usable = [i for i, embedding in enumerate(embeddings) if self.embedding.matches(embedding)]
+        relevances = [0.0] * len(rows)
+        scores = self.embedding.get_similarities(query, [embeddings[i] for i in usable])
+        for i, score in zip(usable, scores):
+            relevances[i] = score
+        
+        # Top results by relevance; a bounded heap avoids sorting every chunk
+        return heapq.nlargest(limit, zip(chunks, relevances), key=lambda x: x[1])
     
-    def _load_builtin_knowledge(self):
-        """Load built-in programming knowledge."""
-        builtin_knowledge = [
-            KnowledgeChunk(
-                id="python-best-practices",
-                content="""
-                Python Best Practices:
-                - Use descriptive variable names
-                - Write docstrings for functions and classes
-                - Follow PEP 8 style guide
-                - Use type hints for better code clarity
-                - Handle exceptions properly with try/except
-                - Use list comprehensions for simple iterations
-                - Prefer f-strings for string formatting
-                - Use context managers (with statements) for resource handling
-                """,
-                source="builtin",
-                chunk_type="documentation",
-                keywords=["python", "best", "practices", "pep8", "docstring", "type", "hints"]
-            ),
-            
-            KnowledgeChunk(
-                id="common-patterns",
-                content="""
-                Common Programming Patterns:
-                
-                Singleton Pattern:
-                class Singleton:
-                    _instance = None
-                    def __new__(cls):
-                        if cls._instance is None:
-                            cls._instance = super().__new__(cls)
-                        return cls._instance
-                
-                Factory Pattern:
-                def create_object(obj_type):
-                    if obj_type == "A":
-                        return ClassA()
-                    elif obj_type == "B":
-                        return ClassB()
-                
-                Decorator Pattern:
-                def my_decorator(func):
-                    def wrapper(*args, **kwargs):
-                        # Before function call
-                        result = func(*args, **kwargs)
-                        # After function call
-                        return result
-                    return wrapper
-                """,
-                source="builtin",
-                chunk_type="pattern",
-                keywords=["singleton", "factory", "decorator", "pattern", "design"]
-            ),
-            
-            KnowledgeChunk(
-                id="error-handling",
-                content="""
-                Error Handling Best Practices:
-                
-                Specific Exception Handling:
-                try:
-                    risky_operation()
-                except ValueError as e:
-                    print(f"Value error: {e}")
-                except FileNotFoundError:
-                    print("File not found")
-                except Exception as e:
-                    print(f"Unexpected error: {e}")
-                finally:
-                    cleanup_resources()
-                
-                Custom Exceptions:
-                class CustomError(Exception):
-                    def __init__(self, message):
-                        self.message = message
-                        super().__init__(self.message)
-                
-                Validation:
-                def validate_input(value):
-                    if not isinstance(value, int):
-                        raise TypeError("Expected integer")
-                    if value < 0:
-                        raise ValueError("Value must be positive")
-                """,
-                source="builtin",
-                chunk_type="code",
-                keywords=["error", "exception", "handling", "try", "catch", "validation"]
-            ),
-            
-            KnowledgeChunk(
-                id="testing-patterns",
-                content="""
-                Testing Patterns:
-                
-                Unit Test Structure:
-                import unittest
-                
-                class TestMyFunction(unittest.TestCase):
-                    def setUp(self):
-                        # Setup before each test
-                        pass
-                    
-                    def test_normal_case(self):
-                        result = my_function(valid_input)
-                        self.assertEqual(result, expected_output)
-                    
-                    def test_edge_case(self):
-                        with self.assertRaises(ValueError):
-                            my_function(invalid_input)
-                
-                Pytest Style:
-                def test_function():
-                    assert my_function(input) == expected
-                
-                def test_exception():
-                    with pytest.raises(ValueError):
-                        my_function(bad_input)
-                
-                Fixtures:
-                @pytest.fixture
-                def sample_data():
-                    return {"key": "value"}
-                """,
-                source="builtin",
-                chunk_type="code",
-                keywords=["testing", "unittest", "pytest", "fixture", "assert", "mock"]
-            ),
-            
+    def _retrieve_from_index(self, query: str,
+                             chunk_types: Optional[List[str]],
+                             limit: int) -> List[Tuple[KnowledgeChunk, float]]:
+        """Retrieve top chunks with a single retrieval-index search."""
+        index = self._index
+        if index is None or not index.ntotal or limit <= 0:
+            return []
+        
+        if self.embedding.dense:
+            # Copy: the cached query embedding is read-only and normalized in place
+            encoded_query = self.embedding.np.array(
+                self.embedding.get_query_embedding(query), dtype="float32"
+            ).reshape(1, -1)
+            _normalize_rows(self.embedding.np, encoded_query)
+        else:
+            encoded_query = self.embedding._tokenize(query)
+        
+        # A type filter is applied after the search, so rank every chunk then
+        k = index.ntotal if chunk_types else min(limit, index.ntotal)
+        scores, positions = index.search(encoded_query, k)
+        
+        # Rank and filter on the per-row columns; only the winners are loaded
+        wanted_types = set(chunk_types) if chunk_types else None
+        ranked = []
+        for pos, score in zip(positions[0], scores[0]):
+            if pos < 0 or (wanted_types and self._index_types[pos] not in wanted_types):
+                continue
+            ranked.append((self._index_ids[pos], float(score)))
+            if len(ranked) == limit:
+                break
+        if not ranked:
+            return []
+        
+        with self._lock, self._conn as conn:
+            placeholders = ','.join('?' * len(ranked))
+            rows = conn.execute(
+                "SELECT id, content, source, chunk_type, keywords, created_at "
+                f"FROM knowledge_chunks WHERE id IN ({placeholders})",
+                [chunk_id for chunk_id, _ in ranked],
+            ).fetchall()
+        
+        chunks = {
+            row[0]: KnowledgeChunk(
+                id=row[0],
+                content=row[1],
+                source=row[2],
+                chunk_type=row[3],
+                keywords=json.loads(row[4]),
+                created_at=row[5]
+            )
+            for row in rows
+        }
+        return [(chunks[chunk_id], score) for chunk_id, score in ranked if chunk_id in chunks]
+    
+    @staticmethod
+    def builtin_chunks() -> List[KnowledgeChunk]:
+        """Built-in programming knowledge seeded into every new database."""
+        return [
             KnowledgeChunk(
-                id="algorithms",
-                content="""
-                Common Algorithms:
-                
-                Binary Search:
-                def binary_search(arr, target):
-                    left, right = 0, len(arr) - 1
-                    while left <= right:
-                        mid = (left + right) // 2
-                        if arr[mid] == target:
-                            return mid
-                        elif arr[mid] < target:
-                            left = mid + 1
-                        else:
-                            right = mid - 1
-                    return -1
-                
-                Fibonacci:
-                def fibonacci(n):
-                    if n <= 1:
-                        return n
-                    return fibonacci(n-1) + fibonacci(n-2)
-                
-                def fibonacci_iterative(n):
-                    if n <= 1:
-                        return n
-                    a, b = 0, 1
-                    for _ in range(2, n + 1):
-                        a, b = b, a + b
-                    return b
-                """,
+                id=chunk_id,
+                content=(BUILTIN_KNOWLEDGE_DIR / f"{chunk_id}.txt").read_text(encoding="utf-8"),
                 source="builtin",
-                chunk_type="code", 
-                keywords=["algorithm", "binary", "search", "fibonacci", "recursive", "iterative"]
+                chunk_type=chunk_type,
+                keywords=keywords
             )
+            for chunk_id, chunk_type, keywords in BUILTIN_CHUNK_INFO
         ]
-        
+    
+    def _load_builtin_knowledge(self):
+        """Load built-in programming knowledge."""
         # Check if knowledge already exists
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.execute("SELECT COUNT(*) FROM knowledge_chunks")
             count = cursor.fetchone()[0]
         
         # Only add if database is empty
         if count == 0:
-            for chunk in builtin_knowledge:
-                self.add_knowledge(chunk)
+            builtin_knowledge = self.builtin_chunks()
+            self.add_knowledge_batch(builtin_knowledge)
     
     def get_context_for_query(self, query: str, max_tokens: int = 2000) -> str:
         """Get relevant context for a query, limited by token count."""
@@ -466,10 +729,9 @@ RESPONSE:
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract keywords from text."""
         # Simple keyword extraction
-        words = re.findall(r'\b\w+\b', text.lower())
+        words = _WORD_RE.findall(text.lower())
         # Filter common words and keep meaningful ones
-        stop_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by"}
-        keywords = [w for w in words if len(w) > 2 and w not in stop_words]
+        keywords = [w for w in words if len(w) > 2 and w not in _STOP_WORDS]
         return list(set(keywords))
 
 
@@ -479,8 +741,8 @@ import math
 
 def demo_rag_system():
     """Demonstrate the RAG system capabilities."""
-    print("🧠 RAG Knowledge Base Demonstration")
-    print("=" * 50)
+    logger.info("🧠 RAG Knowledge Base Demonstration")
+    logger.info("=" * 50)
     
     # Initialize RAG system
     rag_kb = RAGKnowledgeBase()
@@ -493,31 +755,34 @@ def demo_rag_system():
         "How to handle exceptions properly?",
         "Show me design patterns"
     ]
+    show_details = logger.isEnabledFor(logging.DEBUG)
     
     for query in test_queries:
-        print(f"\n🔍 Query: {query}")
-        print("-" * 30)
-        
         relevant_chunks = rag_kb.retrieve_relevant(query, limit=2)
+        logger.info("🔍 Query: %s -> %s", query,
+                    ", ".join(f"{chunk.id} ({score:.3f})" for chunk, score in relevant_chunks))
         
-        for chunk, score in relevant_chunks:
-            print(f"📊 Relevance: {score:.3f}")
-            print(f"📝 Type: {chunk.chunk_type}")
-            print(f"📖 Content: {chunk.content[:200]}...")
-            print()
+        if show_details:
+            for chunk, score in relevant_chunks:
+                logger.debug("  📊 Relevance: %.3f | 📝 Type: %s", score, chunk.chunk_type)
+                logger.debug("  📖 Content: %s...", chunk.preview)
     
     # Demo enhanced prompt
-    print("\n🚀 Enhanced Prompt Example")
-    print("=" * 50)
-    
     agent = RAGEnhancedAgent("demo-agent", "coder", rag_kb)
     original = "Create a function to validate user input"
     enhanced = agent.enhance_prompt(original)
     
-    print("Original prompt:", original)
-    print("\nEnhanced prompt preview:")
-    print(enhanced[:500] + "...")
+    logger.info("🚀 Enhanced prompt for: %s (%d chars)", original, len(enhanced))
+    logger.debug("Enhanced prompt preview:\n%s...", enhanced[:500])
 
 
 if __name__ == "__main__":
-    demo_rag_system()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Demonstrate the RAG knowledge base")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Show retrieved content and the enhanced prompt")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+    demo_rag_system()
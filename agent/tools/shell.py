@@ -8,17 +8,17 @@ from pathlib import Path
 import re
 
 # Safe read-only commands
-WHITELIST: set[str] = {
+WHITELIST: frozenset[str] = frozenset({
     "python", "python3", "pytest", "pip", "pip3",
     "ls", "cat", "echo", "pwd", "which", "type",
     "mkdir", "touch", "rm", "git", "grep", "find", "wc",
     "head", "tail", "diff", "tree", "file",
     "black", "ruff", "mypy", "flake8",  # Linters
     "true", "false", "sleep", "date",  # Testing commands
-}
+})
 
 # Dangerous patterns that should never be allowed
-DANGEROUS_PATTERNS = [
+DANGEROUS_PATTERNS: tuple[str, ...] = (
     r'-rf\s*/$',  # rm -rf /
     r'-rf\s*/etc',  # rm -rf /etc
     r'-rf\s*/usr',  # rm -rf /usr
@@ -38,10 +38,13 @@ DANGEROUS_PATTERNS = [
     r'&&\s*rm',  # chained rm commands
     r';\s*rm',  # semicolon rm
     r'\|\s*rm',  # piped rm
-]
+)
+
+# Compiled once at import; _allowed runs on every LLM-issued command
+_DANGEROUS_RES = tuple(re.compile(p, re.IGNORECASE) for p in DANGEROUS_PATTERNS)
 
 # Commands that should be blocked entirely
-BLOCKLIST: set[str] = {
+BLOCKLIST: frozenset[str] = frozenset({
     "sudo", "su", "doas",
     "curl", "wget", "nc", "netcat",
     "ssh", "scp", "ftp", "telnet",
@@ -49,7 +52,7 @@ BLOCKLIST: set[str] = {
     "chmod", "chown", "chgrp",
     "systemctl", "service", "reboot", "shutdown",
     "iptables", "ufw", "firewall-cmd",
-}
+})
 
 
 @dataclass
@@ -70,9 +73,8 @@ def _allowed(cmd: str) -> bool:
         return False
     
     # Check for dangerous patterns first
-    for pattern in DANGEROUS_PATTERNS:
-        if re.search(pattern, cmd, re.IGNORECASE):
-            return False
+    if any(pattern.search(cmd) for pattern in _DANGEROUS_RES):
+        return False
     
     # Parse command
     try:
@@ -14,6 +14,7 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     packages=find_packages(),
+    package_data={"agent.team": ["data/builtin_knowledge/*.txt"]},
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers", 
@@ -26,6 +27,7 @@ setup(
     ],
     python_requires=">=3.9",
     install_requires=requirements,
+    extras_require={"json": ["orjson>=3.9.0"]},
     entry_points={
         "console_scripts": [
             "turbo-coder=agent.core.orchestrator:main",
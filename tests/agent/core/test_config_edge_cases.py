@@ -121,6 +121,22 @@ class TestSettingsValidation:
                 dry_run=False
             )
 
+    def test_settings_validation_skipped_when_testing(self, monkeypatch):
+        """Test TURBO_TESTING short-circuits validation."""
+        monkeypatch.setenv("TURBO_TESTING", "1")
+        settings = Settings(
+            turbo_host="invalid-url",
+            local_host="http://localhost:8001",
+            planner_model="test",
+            coder_model="test",
+            api_key="short",
+            max_steps=-5,
+            request_timeout_s=120,
+            dry_run=False
+        )
+
+        assert settings.turbo_host == "invalid-url"
+
 
 class TestParseIntWithValidation:
     """Tests for _parse_int_with_validation function."""
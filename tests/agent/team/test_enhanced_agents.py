@@ -7,38 +7,38 @@ import tempfile
 from agent.team.rag_system import RAGEnhancedAgent, RAGKnowledgeBase
 
 
+@pytest.fixture(scope="module")
+def shared_agent(tmp_path_factory):
+    """Agent over a built-in-only knowledge base, shared by read-only tests."""
+    db_path = tmp_path_factory.mktemp("rag") / "shared.db"
+    with RAGKnowledgeBase(str(db_path)) as kb:
+        yield RAGEnhancedAgent("Test Agent", "Test Role", kb)
+
+
 class TestRAGEnhancedAgent:
     """Tests for RAGEnhancedAgent class."""
     
-    def test_initialization(self):
+    def test_initialization(self, tmp_path):
         """Test that RAGEnhancedAgent initializes correctly."""
-        agent = RAGEnhancedAgent("Test Agent", "Test Role")
+        agent = RAGEnhancedAgent("Test Agent", "Test Role", RAGKnowledgeBase(str(tmp_path / "kb.db")))
         assert agent is not None
         assert agent.name == "Test Agent"
         assert agent.role == "Test Role"
         assert isinstance(agent.rag_kb, RAGKnowledgeBase)
+        agent.rag_kb.close()
     
-    def test_enhance_prompt(self):
+    def test_enhance_prompt(self, shared_agent):
         """Test that prompts are enhanced with relevant knowledge."""
-        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
-            db_path = f.name
+        # Test enhancement for a testing query
+        original_prompt = "How do I write unit tests in Python?"
+        enhanced_prompt = shared_agent.enhance_prompt(original_prompt)
         
-        try:
-            agent = RAGEnhancedAgent("Test Agent", "Test Role", RAGKnowledgeBase(db_path))
-            
-            # Test enhancement for a testing query
-            original_prompt = "How do I write unit tests in Python?"
-            enhanced_prompt = agent.enhance_prompt(original_prompt)
-            
-            assert original_prompt in enhanced_prompt
-            assert "=== RELEVANT KNOWLEDGE ===" in enhanced_prompt
-            assert "=== END KNOWLEDGE ===" in enhanced_prompt
-            
-            # Check that relevant knowledge is included
-            assert any(keyword in enhanced_prompt.lower() for keyword in ["test", "testing", "unittest", "pytest"])
-            
-        finally:
-            os.unlink(db_path)
+        assert original_prompt in enhanced_prompt
+        assert "=== RELEVANT KNOWLEDGE ===" in enhanced_prompt
+        assert "=== END KNOWLEDGE ===" in enhanced_prompt
+        
+        # Check that relevant knowledge is included
+        assert any(keyword in enhanced_prompt.lower() for keyword in ["test", "testing", "unittest", "pytest"])
     
     def test_add_experience(self):
         """Test that experience can be added."""
@@ -57,31 +57,19 @@ class TestRAGEnhancedAgent:
             # Verify the experience was added
             results = agent.rag_kb.retrieve_relevant("How to read a file in Python?")
             assert len(results) > 0
+            agent.rag_kb.close()
             
         finally:
             os.unlink(db_path)
     
-    def test_prompt_enhancement_with_different_query_types(self):
+    @pytest.mark.parametrize("prompt, expected_any", [
+        ("What are Python best practices?", ["best practices"]),
+        ("Show me some Python design patterns", ["singleton", "factory", "decorator"]),
+    ])
+    def test_prompt_enhancement_with_different_query_types(self, shared_agent, prompt, expected_any):
         """Test that different query types get appropriate context."""
-        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
-            db_path = f.name
-        
-        try:
-            agent = RAGEnhancedAgent("Test Agent", "Test Role", RAGKnowledgeBase(db_path))
-            
-            # Test for best practices query
-            prompt1 = "What are Python best practices?"
-            enhanced1 = agent.enhance_prompt(prompt1)
-            assert "best practices" in enhanced1.lower()
-            
-            # Test for pattern/design query
-            prompt2 = "Show me some Python design patterns"
-            enhanced2 = agent.enhance_prompt(prompt2)
-            assert any(pattern in enhanced2.lower() for pattern in ["singleton", "factory", "decorator"])
-            
-        finally:
-            os.unlink(db_path)
-
+        enhanced = shared_agent.enhance_prompt(prompt)
+        assert any(expected in enhanced.lower() for expected in expected_any)
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
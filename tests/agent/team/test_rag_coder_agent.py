@@ -20,9 +20,8 @@ class TestRAGCoderAgent:
             db_path = f.name
         try:
             kb = RAGKnowledgeBase(db_path)
-            agent = RAGCoderAgent("test-coder")
-            agent.rag_kb = kb
-            yield agent
+            yield RAGCoderAgent("test-coder", kb)
+            kb.close()
         finally:
             os.unlink(db_path)
 
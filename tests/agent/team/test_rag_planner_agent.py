@@ -20,9 +20,8 @@ class TestRAGPlannerAgent:
             db_path = f.name
         try:
             kb = RAGKnowledgeBase(db_path)
-            agent = RAGPlannerAgent("test-planner")
-            agent.rag_kb = kb  # Override with our KB
-            yield agent
+            yield RAGPlannerAgent("test-planner", kb)
+            kb.close()
         finally:
             os.unlink(db_path)
 
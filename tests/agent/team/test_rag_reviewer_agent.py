@@ -20,9 +20,8 @@ class TestRAGReviewerAgent:
             db_path = f.name
         try:
             kb = RAGKnowledgeBase(db_path)
-            agent = RAGReviewerAgent("test-reviewer")
-            agent.rag_kb = kb
-            yield agent
+            yield RAGReviewerAgent("test-reviewer", kb)
+            kb.close()
         finally:
             os.unlink(db_path)
 
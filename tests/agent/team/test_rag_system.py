@@ -1,11 +1,91 @@
 """
 Tests for RAG System
 """
+import contextlib
+import importlib.machinery
 import pytest
 import os
+import re
 import tempfile
 import sqlite3
-from agent.team.rag_system import RAGKnowledgeBase, KnowledgeChunk
+import sys
+import types
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from agent.team import rag_system
+from agent.team.rag_system import RAGKnowledgeBase, KnowledgeChunk, SemanticEmbedding
+
+
+class _HashEncoder:
+    """Deterministic bag-of-words encoder standing in for a sentence model."""
+
+    dim = 64
+
+    def __init__(self, model_name=None):
+        self.calls = 0
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, text, batch_size=32, convert_to_tensor=False):
+        import numpy as np
+        self.calls += 1
+        if isinstance(text, list):
+            return np.stack([self._encode_one(t) for t in text])
+        return self._encode_one(text)
+
+    def _encode_one(self, text):
+        import numpy as np
+        vector = np.zeros(self.dim, dtype="float32")
+        for token in re.findall(r"\w+", text.lower()):
+            # crc32, not hash(): str hashes vary per process (PYTHONHASHSEED)
+            vector[zlib.crc32(token.encode()) % self.dim] += 1.0
+        return vector
+
+
+@pytest.fixture
+def dense_embedding(monkeypatch):
+    """Make SemanticEmbedding load _HashEncoder as its sentence model."""
+    pytest.importorskip("numpy")
+    module = types.ModuleType("sentence_transformers")
+    module.__spec__ = importlib.machinery.ModuleSpec("sentence_transformers", None)
+    module.SentenceTransformer = _HashEncoder
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+
+
+class TestKnowledgeChunk:
+    """Tests for KnowledgeChunk."""
+
+    def test_preview(self):
+        """Test preview collapses whitespace and is truncated."""
+        chunk = KnowledgeChunk(
+            id="c", content="\n    Title:\n\n    body  text\n" + "x" * 200,
+            source="test", chunk_type="code", keywords=[],
+        )
+        assert chunk.preview.startswith("Title: body text x")
+        assert len(chunk.preview) == rag_system.PREVIEW_LENGTH
+
+
+# (query, text expected in at least one retrieved chunk)
+RETRIEVAL_CASES = [
+    ("Python best practices", "best practices"),
+    ("How to write unit tests in Python", "testing"),
+    ("Implement fibonacci function", "fibonacci"),
+]
+
+
+@pytest.fixture(scope="module")
+def shared_kb(tmp_path_factory):
+    """Knowledge base with only built-in chunks, shared by read-only tests."""
+    with RAGKnowledgeBase(str(tmp_path_factory.mktemp("rag") / "shared.db")) as kb:
+        yield kb
+
+
+@pytest.fixture
+def open_kb(tmp_path):
+    """Open knowledge bases under tmp_path, closing them after the test."""
+    with contextlib.ExitStack() as stack:
+        yield lambda name="kb.db": stack.enter_context(RAGKnowledgeBase(str(tmp_path / name)))
 
 
 class TestRAGKnowledgeBase:
@@ -25,35 +105,18 @@ class TestRAGKnowledgeBase:
                 cursor = conn.execute("SELECT COUNT(*) FROM knowledge_chunks")
                 count = cursor.fetchone()[0]
                 assert count > 0
+            conn.close()
+            rag_kb.close()
                 
         finally:
             os.unlink(db_path)
     
-    def test_retrieve_relevant(self):
+    @pytest.mark.parametrize("query, expected", RETRIEVAL_CASES)
+    def test_retrieve_relevant(self, shared_kb, query, expected):
         """Test that relevant knowledge is retrieved for a query."""
-        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
-            db_path = f.name
-        
-        try:
-            rag_kb = RAGKnowledgeBase(db_path)
-            
-            # Test retrieval for Python best practices
-            results = rag_kb.retrieve_relevant("Python best practices")
-            assert len(results) > 0
-            assert any("best practices" in chunk.content.lower() for chunk, score in results)
-            
-            # Test retrieval for testing
-            results = rag_kb.retrieve_relevant("How to write unit tests in Python")
-            assert len(results) > 0
-            assert any("testing" in chunk.content.lower() for chunk, score in results)
-            
-            # Test retrieval for algorithms
-            results = rag_kb.retrieve_relevant("Implement fibonacci function")
-            assert len(results) > 0
-            assert any("fibonacci" in chunk.content.lower() for chunk, score in results)
-            
-        finally:
-            os.unlink(db_path)
+        results = shared_kb.retrieve_relevant(query)
+        assert len(results) > 0
+        assert any(expected in chunk.content.lower() for chunk, score in results)
     
     def test_add_knowledge(self):
         """Test that adding knowledge works."""
@@ -78,26 +141,301 @@ class TestRAGKnowledgeBase:
             results = rag_kb.retrieve_relevant("Python dictionary")
             assert len(results) > 0
             assert any("test knowledge chunk" in chunk.content for chunk, score in results)
+            rag_kb.close()
             
         finally:
             os.unlink(db_path)
     
-    def test_get_context_for_query(self):
+    def test_add_knowledge_batch(self, open_kb, dense_embedding):
+        """Test batch adds embed once and are retrievable like single adds."""
+        rag_kb = open_kb()
+        calls = rag_kb.embedding.model.calls
+        chunks = [
+            KnowledgeChunk(
+                id=f"pattern-{name}",
+                content=f"{name} pattern: reusable {name} helper",
+                source="test",
+                chunk_type="pattern",
+                keywords=[name],
+            )
+            for name in ("api", "validation")
+        ]
+
+        assert rag_kb.add_knowledge_batch(chunks) == ["pattern-api", "pattern-validation"]
+        assert rag_kb.embedding.model.calls == calls + 1
+        assert rag_kb.add_knowledge_batch([]) == []
+
+        results = rag_kb.retrieve_relevant("validation helper", ["pattern"], limit=1)
+        assert results[0][0].id == "pattern-validation"
+
+    def test_connection_uses_wal(self, tmp_path, open_kb):
+        """Test the knowledge base keeps one WAL-mode connection open."""
+        db_path = str(tmp_path / "kb.db")
+        rag_kb = open_kb()
+        assert rag_kb._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+        rag_kb.add_knowledge(KnowledgeChunk(
+            id="experience-1", content="Use pathlib for paths", source="experience",
+            chunk_type="example", keywords=["pathlib"],
+        ))
+        # Committed writes are visible to other connections straight away
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute(
+                "SELECT COUNT(*) FROM knowledge_chunks WHERE id = 'experience-1'"
+            ).fetchone()[0] == 1
+
+    def test_shared_across_threads(self, open_kb):
+        """Test one knowledge base serves adds and queries from other threads."""
+        rag_kb = open_kb()
+
+        def learn(i):
+            rag_kb.add_knowledge(KnowledgeChunk(
+                id=f"experience-{i}", content=f"Threaded lesson {i}", source="experience",
+                chunk_type="example", keywords=[],
+            ))
+            return rag_kb.retrieve_relevant(f"Threaded lesson {i}", ["example"], limit=10)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(learn, range(8)))
+
+        assert all(results)
+        assert len(rag_kb.retrieve_relevant("", ["example"], limit=100)) == 8
+
+    def test_context_manager_closes(self, tmp_path):
+        """Test leaving the with block closes the connection."""
+        with RAGKnowledgeBase(str(tmp_path / "kb.db")) as rag_kb:
+            assert rag_kb.retrieve_relevant("", limit=1)
+        with pytest.raises(sqlite3.ProgrammingError):
+            rag_kb.retrieve_relevant("", limit=1)
+
+    def test_model_loads_lazily(self, open_kb, dense_embedding):
+        """Test an already-populated base defers loading the embedding model."""
+        open_kb()
+
+        rag_kb = open_kb()
+        assert "model" not in vars(rag_kb.embedding)
+        assert rag_kb._index.ntotal == 5
+
+        rag_kb.retrieve_relevant("Implement fibonacci function")
+        assert "model" in vars(rag_kb.embedding)
+
+    def test_model_import_failure_rebuilds_index(self, open_kb, dense_embedding):
+        """Test a dense index is rebuilt for TF-IDF when the model fails to load."""
+        open_kb()
+        del sys.modules["sentence_transformers"].SentenceTransformer
+
+        rag_kb = open_kb()
+        assert rag_kb.embedding.dense
+        results = rag_kb.retrieve_relevant("Implement fibonacci function")
+        assert not rag_kb.embedding.dense
+        assert [score for _, score in results] == [0.0] * 5
+
+        rag_kb.add_knowledge_batch([
+            KnowledgeChunk(id=f"experience-{i}", content=content, source="experience",
+                           chunk_type="example", keywords=[])
+            for i, content in enumerate(["Paths with pathlib", "Fibonacci with memoization"])
+        ])
+        assert rag_kb.retrieve_relevant("fibonacci memoization", limit=1)[0][0].id == "experience-1"
+
+    def test_get_context_for_query(self, shared_kb):
         """Test that context is provided for queries."""
-        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
-            db_path = f.name
-        
-        try:
-            rag_kb = RAGKnowledgeBase(db_path)
-            
-            # Test getting context for testing query
-            context = rag_kb.get_context_for_query("How do I test Python code?")
-            assert "=== RELEVANT KNOWLEDGE ===" in context
-            assert "=== END KNOWLEDGE ===" in context
-            assert len(context) > 100
-            
-        finally:
-            os.unlink(db_path)
+        context = shared_kb.get_context_for_query("How do I test Python code?")
+        assert "=== RELEVANT KNOWLEDGE ===" in context
+        assert "=== END KNOWLEDGE ===" in context
+        assert len(context) > 100
+    
+    def test_empty_query_lists_without_scoring(self, open_kb, monkeypatch):
+        """Test an empty query lists chunks without embedding anything."""
+        rag_kb = open_kb()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("empty query must not be scored")
+
+        monkeypatch.setattr(rag_kb.embedding, "get_similarities", fail)
+
+        everything = rag_kb.retrieve_relevant("", limit=100)
+        assert len(everything) == 5
+        assert all(score == 0.0 for _, score in everything)
+        assert len(rag_kb.retrieve_relevant("  ", limit=2)) == 2
+        assert {c.chunk_type for c, _ in rag_kb.retrieve_relevant("", ["code"], 100)} == {"code"}
+
+    @pytest.mark.parametrize("use_faiss", [True, False])
+    def test_dense_index_matches_linear_scan(self, open_kb, dense_embedding, monkeypatch, use_faiss):
+        """Test vector-index retrieval ranks chunks like the linear scan."""
+        if use_faiss:
+            pytest.importorskip("faiss")
+        else:
+            monkeypatch.setattr(rag_system, "faiss", None)
+        rag_kb = open_kb()
+        assert rag_kb._index is not None
+        if not use_faiss:
+            assert isinstance(rag_kb._index, rag_system._EmbeddingMatrix)
+
+        queries = [
+            ("Implement fibonacci function", None),
+            ("python exception handling", ["code"]),
+        ]
+        indexed = [rag_kb.retrieve_relevant(q, types, limit=3) for q, types in queries]
+        rag_kb._index = None
+        scanned = [rag_kb.retrieve_relevant(q, types, limit=3) for q, types in queries]
+
+        for got, expected in zip(indexed, scanned):
+            assert [c.id for c, _ in got] == [c.id for c, _ in expected]
+            assert [s for _, s in got] == pytest.approx([s for _, s in expected], abs=1e-5)
+
+    def test_token_index_matches_linear_scan(self, open_kb, monkeypatch):
+        """Test TF-IDF postings retrieval ranks chunks like the linear scan."""
+        with monkeypatch.context() as m:
+            # Force the TF-IDF fallback even where sentence-transformers exists
+            m.setitem(sys.modules, "sentence_transformers", None)
+            rag_kb = open_kb()
+        rag_kb.add_knowledge(KnowledgeChunk(
+            id="extra", content="Handle a python exception with try/except",
+            source="test", chunk_type="code", keywords=[],
+        ))
+        assert isinstance(rag_kb._index, rag_system._TokenIndex)
+
+        queries = [
+            ("Implement fibonacci function", None),
+            ("python exception handling", ["code"]),
+            ("zzz unmatched", None),
+        ]
+        indexed = [rag_kb.retrieve_relevant(q, types, limit=3) for q, types in queries]
+        rag_kb._index = None
+        scanned = [rag_kb.retrieve_relevant(q, types, limit=3) for q, types in queries]
+
+        for got, expected in zip(indexed, scanned):
+            assert [c.id for c, _ in got] == [c.id for c, _ in expected]
+            assert [s for _, s in got] == pytest.approx([s for _, s in expected])
+
+    def test_sees_other_instances_writes(self, open_kb, dense_embedding):
+        """Test retrieval picks up chunks another instance on the file committed."""
+        reader = open_kb()
+        writer = open_kb()
+        writer.add_knowledge(KnowledgeChunk(
+            id="exp1", content="Read files with pathlib: Path(name).read_text()",
+            source="experience", chunk_type="example", keywords=[],
+        ))
+
+        results = reader.retrieve_relevant("read files with pathlib", limit=3)
+        assert results[0][0].id == "exp1"
+        assert len(reader._index_ids) == 6
+
+    def test_mixed_embedding_modes(self, open_kb, dense_embedding, monkeypatch):
+        """Test chunks embedded in the other mode score 0.0 instead of failing."""
+        open_kb("dense.db")
+        with monkeypatch.context() as m:
+            m.setitem(sys.modules, "sentence_transformers", None)
+            open_kb("tfidf.db")
+            tfidf_over_dense = open_kb("dense.db")
+        dense_over_tfidf = open_kb("tfidf.db")
+
+        new_chunk = KnowledgeChunk(
+            id="new", content="python exception handling tips",
+            source="test", chunk_type="code", keywords=[],
+        )
+        for rag_kb in (tfidf_over_dense, dense_over_tfidf):
+            assert rag_kb._index is None
+            results = rag_kb.retrieve_relevant("python exception handling", limit=3)
+            assert [score for _, score in results] == [0.0, 0.0, 0.0]
+
+            rag_kb.add_knowledge(new_chunk)
+            assert len(rag_kb._index_ids) == 6
+            results = rag_kb.retrieve_relevant("python exception handling", limit=6)
+            assert len(results) == 6
+        assert results[0][0].id == "new"
+
+    def test_embedding_matrix_grows(self):
+        """Test the numpy index keeps rows when growing past capacity."""
+        np = pytest.importorskip("numpy")
+        matrix = rag_system._EmbeddingMatrix(np, dim=2, capacity=1)
+        matrix.add(np.array([[1.0, 0.0]], dtype="float32"))
+        matrix.add(np.array([[0.0, 1.0], [0.6, 0.8]], dtype="float32"))
+        assert matrix.ntotal == 3
+
+        query = np.array([[0.0, 1.0]], dtype="float32")
+        scores, positions = matrix.search(query, 2)
+        assert positions[0].tolist() == [1, 2]
+        assert scores[0].tolist() == pytest.approx([1.0, 0.8])
+
+        _, positions = matrix.search(query, 10)
+        assert positions[0].tolist() == [1, 2, 0]
+
+    def test_faiss_index_switches_to_pq(self, open_kb, dense_embedding, monkeypatch):
+        """Test large knowledge bases move to a trained IVF-PQ index."""
+        faiss = pytest.importorskip("faiss")
+        monkeypatch.setattr(rag_system, "PQ_MIN_CHUNKS", 300)
+        rag_kb = open_kb("pq.db")
+        assert isinstance(rag_kb._index, faiss.IndexFlatIP)
+
+        start = len(rag_kb._index_ids)
+        for i in range(start, 300):
+            rag_kb.add_knowledge(KnowledgeChunk(
+                id=f"chunk-{i}",
+                content=f"topic{i} detail{i} note{i}",
+                source="test",
+                chunk_type="example",
+                keywords=[f"topic{i}"],
+            ))
+
+        assert isinstance(rag_kb._index, faiss.IndexIVFPQ)
+        assert rag_kb._index.ntotal == 300
+        results = rag_kb.retrieve_relevant("topic42 detail42 note42", limit=5)
+        assert "chunk-42" in [chunk.id for chunk, _ in results]
+
+
+class TestSemanticEmbedding:
+    """Tests for SemanticEmbedding batch scoring."""
+
+    DOCS = [
+        "Use try/except for error handling",
+        "Binary search over a sorted list",
+        "pytest fixtures and error assertions",
+    ]
+
+    def _assert_batch_matches_single(self, embedding, queries):
+        doc_embeddings = [embedding.get_embedding(doc) for doc in self.DOCS]
+        for query in queries:
+            expected = [embedding.get_similarity(query, doc) for doc in doc_embeddings]
+            assert embedding.get_similarities(query, doc_embeddings) == pytest.approx(expected)
+
+    def test_get_similarities_tfidf(self):
+        """Test batch TF-IDF scores equal per-document scores."""
+        embedding = SemanticEmbedding()
+        if embedding.dense:
+            pytest.skip("sentence-transformers installed; TF-IDF fallback unused")
+        self._assert_batch_matches_single(embedding, ["error handling in pytest", "", "unrelated words"])
+
+    def test_failed_import_falls_back_to_tfidf(self, monkeypatch):
+        """Test an installed but unimportable sentence-transformers degrades to TF-IDF."""
+        pytest.importorskip("numpy")
+        # Found by the probe, but importing SentenceTransformer from it fails
+        module = types.ModuleType("sentence_transformers")
+        module.__spec__ = importlib.machinery.ModuleSpec("sentence_transformers", None)
+        monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+        embedding = SemanticEmbedding()
+        assert embedding.dense
+        assert isinstance(embedding.get_embedding("error handling"), dict)
+        assert not embedding.dense
+        assert embedding.model is None
+
+    def test_get_similarities_dense(self, dense_embedding):
+        """Test batch dense scores equal per-document cosine similarity."""
+        self._assert_batch_matches_single(SemanticEmbedding(), ["error handling in pytest", "unrelated words"])
+
+    def test_query_embeddings_are_cached(self, dense_embedding):
+        """Test repeated queries are encoded once."""
+        embedding = SemanticEmbedding()
+        doc = embedding.get_embedding("error handling")
+        calls = embedding.model.calls
+
+        embedding.get_similarity("error handling", doc)
+        embedding.get_similarities(" error handling ", [doc, doc])
+        assert embedding.model.calls == calls + 1
+
+    def test_get_similarities_empty(self):
+        """Test scoring against no documents."""
+        assert SemanticEmbedding().get_similarities("anything", []) == []
 
 
 if __name__ == "__main__":
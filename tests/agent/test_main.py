@@ -1,43 +1,44 @@
 """
 Tests for agent/main.py
 """
+from types import SimpleNamespace
+
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from agent.main import execute_standard_workflow, execute_enhanced_workflow
 from agent.core.config import Settings
 
+pytestmark = pytest.mark.usefixtures("skip_settings_validation")
+
+_BASE_SETTINGS_KWARGS = dict(
+    turbo_host="http://test.com",
+    local_host="http://localhost:8000",
+    planner_model="test-model",
+    coder_model="test-model",
+    api_key="sk-test-key-long-enough-for-validation",
+    max_steps=10,
+    request_timeout_s=30,
+)
+
 
 class TestExecuteStandardWorkflow:
     """Tests for execute_standard_workflow function."""
 
     @patch('agent.main.get_plan')
     @patch('agent.main.execute')
-    @patch('agent.core.config.Settings._validate_settings')
-    def test_execute_standard_workflow_success(self, mock_validate, mock_execute, mock_get_plan):
+    def test_execute_standard_workflow_success(self, mock_execute, mock_get_plan):
         """Test successful execution of standard workflow."""
         # Setup mocks
-        mock_validate.return_value = None  # Skip validation
         mock_reporter = Mock()
 
-        mock_plan = Mock()
-        mock_plan.plan = ["step1", "step2"]
-        mock_plan.coder_prompt = "test prompt"
+        mock_plan = SimpleNamespace(plan=["step1", "step2"], coder_prompt="test prompt")
         mock_get_plan.return_value = mock_plan
 
         mock_result = Mock()
         mock_execute.return_value = mock_result
 
         # Test settings
-        settings = Settings(
-            turbo_host="http://test.com",
-            local_host="http://localhost:8000",
-            planner_model="test-model",
-            coder_model="test-model",
-            api_key="sk-test-key-long-enough-for-validation",
-            max_steps=10,
-            request_timeout_s=30,
-            dry_run=False
-        )
+        settings = Settings(**_BASE_SETTINGS_KWARGS, dry_run=False)
 
         # Execute
         result = execute_standard_workflow("test task", settings, mock_reporter)
@@ -55,25 +56,14 @@ class TestExecuteStandardWorkflow:
         assert result == mock_result
 
     @patch('agent.main.get_plan')
-    @patch('agent.core.config.Settings._validate_settings')
-    def test_execute_standard_workflow_dry_run(self, mock_validate, mock_get_plan):
+    def test_execute_standard_workflow_dry_run(self, mock_get_plan):
         """Test dry run mode."""
-        mock_validate.return_value = None  # Skip validation
         mock_reporter = Mock()
 
-        mock_plan = Mock()
+        mock_plan = SimpleNamespace(plan=["step1", "step2"], coder_prompt="test prompt")
         mock_get_plan.return_value = mock_plan
 
-        settings = Settings(
-            turbo_host="http://test.com",
-            local_host="http://localhost:8000",
-            planner_model="test-model",
-            coder_model="test-model",
-            api_key="sk-test-key-long-enough-for-validation",
-            max_steps=10,
-            request_timeout_s=30,
-            dry_run=True
-        )
+        settings = Settings(**_BASE_SETTINGS_KWARGS, dry_run=True)
 
         result = execute_standard_workflow("test task", settings, mock_reporter)
 
@@ -83,30 +73,17 @@ class TestExecuteStandardWorkflow:
 
     @patch('agent.main.get_plan')
     @patch('agent.main.execute')
-    @patch('agent.core.config.Settings._validate_settings')
-    def test_execute_standard_workflow_no_enhance(self, mock_validate, mock_execute, mock_get_plan):
+    def test_execute_standard_workflow_no_enhance(self, mock_execute, mock_get_plan):
         """Test workflow without enhancement."""
-        mock_validate.return_value = None  # Skip validation
         mock_reporter = Mock()
 
-        mock_plan = Mock()
-        mock_plan.plan = ["step1", "step2"]  # Make it iterable
-        mock_plan.coder_prompt = "test prompt"
+        mock_plan = SimpleNamespace(plan=["step1", "step2"], coder_prompt="test prompt")
         mock_get_plan.return_value = mock_plan
 
         mock_result = Mock()
         mock_execute.return_value = mock_result
 
-        settings = Settings(
-            turbo_host="http://test.com",
-            local_host="http://localhost:8000",
-            planner_model="test-model",
-            coder_model="test-model",
-            api_key="sk-test-key-long-enough-for-validation",
-            max_steps=10,
-            request_timeout_s=30,
-            dry_run=False
-        )
+        settings = Settings(**_BASE_SETTINGS_KWARGS, dry_run=False)
 
         result = execute_standard_workflow("test task", settings, mock_reporter, enhance=False)
 
@@ -118,26 +95,15 @@ class TestExecuteEnhancedWorkflow:
     """Tests for execute_enhanced_workflow function."""
 
     @patch('agent.team.workflow.CodingWorkflow')
-    @patch('agent.core.config.Settings._validate_settings')
-    def test_execute_enhanced_workflow_success(self, mock_validate, mock_coding_workflow):
+    def test_execute_enhanced_workflow_success(self, mock_coding_workflow):
         """Test successful execution of enhanced workflow."""
-        mock_validate.return_value = None  # Skip validation
         mock_reporter = Mock()
 
         mock_workflow_instance = Mock()
         mock_workflow_instance.execute_full_workflow.return_value = "success"
         mock_coding_workflow.return_value = mock_workflow_instance
 
-        settings = Settings(
-            turbo_host="http://test.com",
-            local_host="http://localhost:8000",
-            planner_model="test-model",
-            coder_model="test-model",
-            api_key="sk-test-key-long-enough-for-validation",
-            max_steps=10,
-            request_timeout_s=30,
-            dry_run=False
-        )
+        settings = Settings(**_BASE_SETTINGS_KWARGS, dry_run=False)
 
         result = execute_enhanced_workflow(
             "test task", settings, mock_reporter,
@@ -155,24 +121,13 @@ class TestExecuteEnhancedWorkflow:
         assert result == "success"
 
     @patch('agent.main.execute_standard_workflow')
-    @patch('agent.core.config.Settings._validate_settings')
-    def test_execute_enhanced_workflow_fallback(self, mock_validate, mock_standard_workflow):
+    def test_execute_enhanced_workflow_fallback(self, mock_standard_workflow):
         """Test fallback to standard workflow when team workflow fails to import."""
-        mock_validate.return_value = None  # Skip validation
         mock_reporter = Mock()
 
         mock_standard_workflow.return_value = "fallback_result"
 
-        settings = Settings(
-            turbo_host="http://test.com",
-            local_host="http://localhost:8000",
-            planner_model="test-model",
-            coder_model="test-model",
-            api_key="sk-test-key-long-enough-for-validation",
-            max_steps=10,
-            request_timeout_s=30,
-            dry_run=False
-        )
+        settings = Settings(**_BASE_SETTINGS_KWARGS, dry_run=False)
 
         # Mock the import to fail by patching the module before import
         import sys
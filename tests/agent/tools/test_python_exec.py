@@ -7,6 +7,15 @@ from unittest.mock import patch, Mock, ANY
 from agent.tools.python_exec import python_run, PyRunResult
 
 
+@pytest.fixture(autouse=True)
+def _no_real_subprocess(monkeypatch):
+    """Fail loudly instead of forking an interpreter if a test forgets to patch."""
+    def guard(*args, **kwargs):
+        raise RuntimeError("unpatched subprocess.run in test")
+
+    monkeypatch.setattr("subprocess.run", guard)
+
+
 class TestPythonRun:
     """Tests for python_run function."""
 
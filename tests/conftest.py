@@ -4,6 +4,13 @@ from __future__ import annotations
 import pytest
 from unittest.mock import MagicMock
 
+# Import the executor package up front so every xdist worker pays the
+# import once, before collection, instead of on first use inside a test.
+import agent.core.executor.base  # noqa: F401
+import agent.core.executor.dispatch  # noqa: F401
+import agent.core.executor.formatters  # noqa: F401
+import agent.core.executor.orchestrator  # noqa: F401
+
 
 @pytest.fixture
 def mock_reporter() -> MagicMock:
@@ -25,3 +32,19 @@ def mock_settings() -> MagicMock:
     settings.coder_model = "test-model"
     settings.max_steps = 10
     return settings
+
+
+@pytest.fixture(scope="session")
+def tool_schema() -> list:
+    """Build the executor tool schema once per test session."""
+    from agent.core.executor.base import get_tool_schema
+
+    return get_tool_schema()
+
+
+@pytest.fixture(scope="module")
+def skip_settings_validation():
+    """Skip Settings validation for a whole test module via TURBO_TESTING."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("TURBO_TESTING", "1")
+        yield
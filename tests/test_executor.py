@@ -1,4 +1,7 @@
-"""Tests for Executor module."""
+"""Tests for Executor module.
+
+PYTEST_DONT_REWRITE: two None checks on Executor.sandbox.
+"""
 import pytest
 from agent.core.executor import Executor
 
@@ -1,15 +1,28 @@
 """Tests for executor base types and utilities."""
 from __future__ import annotations
 
+import copy
+import dataclasses
+import pickle
+
 import pytest
 
 from agent.core.executor.base import (
     ExecSummary,
+    ToolSchema,
     get_tool_schema,
     sanitize_path,
     sanitize_command,
 )
 
+VALID_PATHS = ("file.py", "dir/file.py", "test_file.txt", "path/to/file.json")
+TRAVERSAL_PATHS = ("../etc/passwd", "dir/../../file", "..\\windows\\system32")
+INVALID_CHAR_PATHS = ("file;rm -rf", "file|cat", "file&whoami", "file$var")
+
+VALID_COMMANDS = ("pytest", "python test.py", "ls -la", "grep pattern file")
+METACHARACTER_COMMANDS = ("ls; rm -rf /", "cat file | nc", "echo test && whoami", "ls `whoami`")
+EVAL_EXEC_COMMANDS = ("eval 'bad code'", "exec python_code")
+
 
 class TestExecSummary:
     """Test ExecSummary dataclass."""
@@ -17,8 +30,7 @@ class TestExecSummary:
     def test_creation(self) -> None:
         """Test creating ExecSummary."""
         summary = ExecSummary(steps=5, last="done")
-        assert summary.steps == 5
-        assert summary.last == "done"
+        assert dataclasses.asdict(summary) == {"steps": 5, "last": "done"}
 
     def test_frozen(self) -> None:
         """Test ExecSummary is immutable."""
@@ -26,87 +38,95 @@ class TestExecSummary:
         with pytest.raises(AttributeError):
             summary.steps = 10  # type: ignore
 
+    def test_slots(self) -> None:
+        """Test ExecSummary carries no per-instance __dict__."""
+        summary = ExecSummary(steps=5, last="done")
+        assert not hasattr(summary, "__dict__")
+        assert summary == ExecSummary(steps=5, last="done")
+        assert hash(summary) == hash(ExecSummary(steps=5, last="done"))
+
+    def test_pickle_round_trip(self) -> None:
+        """Test slotted ExecSummary survives pickling and copying."""
+        summary = ExecSummary(steps=5, last="done")
+        assert pickle.loads(pickle.dumps(summary)) == summary
+        assert copy.deepcopy(summary) == summary
+
 
 class TestToolSchema:
     """Test tool schema generation."""
 
-    def test_get_tool_schema(self) -> None:
+    def test_get_tool_schema(self, tool_schema: list[ToolSchema]) -> None:
         """Test getting tool schema."""
-        tools = get_tool_schema()
-        assert len(tools) == 5
-        assert all("type" in t for t in tools)
-        assert all("function" in t for t in tools)
+        assert len(tool_schema) == 5
+        assert all("type" in t for t in tool_schema)
+        assert all("function" in t for t in tool_schema)
 
-    def test_tool_names(self) -> None:
+    def test_tool_names(self, tool_schema: list[ToolSchema]) -> None:
         """Test tool names are correct."""
-        tools = get_tool_schema()
-        names = {t["function"]["name"] for t in tools}
+        names = {t["function"]["name"] for t in tool_schema}
         expected = {"fs_read", "fs_write", "fs_list", "shell_run", "python_run"}
         assert names == expected
 
-    def test_tool_parameters(self) -> None:
+    def test_tool_parameters(self, tool_schema: list[ToolSchema]) -> None:
         """Test tool parameters are defined."""
-        tools = get_tool_schema()
-        for tool in tools:
+        for tool in tool_schema:
             func = tool["function"]
             assert "parameters" in func
             assert "properties" in func["parameters"]
             assert "required" in func["parameters"]
 
+    def test_schema_is_cached(self) -> None:
+        """Test the schema is built once and shared."""
+        assert get_tool_schema() is get_tool_schema()
+
 
 class TestSanitizePath:
     """Test path sanitization for security."""
 
-    def test_valid_paths(self) -> None:
+    @pytest.mark.parametrize("path", VALID_PATHS)
+    def test_valid_paths(self, path: str) -> None:
         """Test valid paths pass through."""
-        valid = ["file.py", "dir/file.py", "test_file.txt", "path/to/file.json"]
-        for path in valid:
-            assert sanitize_path(path) == path
+        assert sanitize_path(path) == path
 
-    def test_path_traversal_blocked(self) -> None:
+    @pytest.mark.parametrize("path", TRAVERSAL_PATHS)
+    def test_path_traversal_blocked(self, path: str) -> None:
         """Test path traversal is blocked."""
-        dangerous = ["../etc/passwd", "dir/../../file", "..\\windows\\system32"]
-        for path in dangerous:
-            with pytest.raises(ValueError, match="Invalid path"):
-                sanitize_path(path)
+        with pytest.raises(ValueError, match="Invalid path"):
+            sanitize_path(path)
 
     def test_absolute_paths_blocked(self) -> None:
         """Test absolute paths are blocked."""
         with pytest.raises(ValueError, match="Invalid path"):
             sanitize_path("/etc/passwd")
 
-    def test_invalid_characters(self) -> None:
+    @pytest.mark.parametrize("path", INVALID_CHAR_PATHS)
+    def test_invalid_characters(self, path: str) -> None:
         """Test invalid characters are blocked."""
-        dangerous = ["file;rm -rf", "file|cat", "file&whoami", "file$var"]
-        for path in dangerous:
-            with pytest.raises(ValueError, match="invalid characters"):
-                sanitize_path(path)
+        with pytest.raises(ValueError, match="invalid characters"):
+            sanitize_path(path)
 
 
 class TestSanitizeCommand:
     """Test command sanitization for security."""
 
-    def test_valid_commands(self) -> None:
+    @pytest.mark.parametrize("cmd", VALID_COMMANDS)
+    def test_valid_commands(self, cmd: str) -> None:
         """Test valid commands pass through."""
-        valid = ["pytest", "python test.py", "ls -la", "grep pattern file"]
-        for cmd in valid:
-            assert sanitize_command(cmd) == cmd
+        assert sanitize_command(cmd) == cmd
 
-    def test_shell_metacharacters_blocked(self) -> None:
+    @pytest.mark.parametrize("cmd", METACHARACTER_COMMANDS)
+    def test_shell_metacharacters_blocked(self, cmd: str) -> None:
         """Test shell metacharacters are blocked."""
-        dangerous = ["ls; rm -rf /", "cat file | nc", "echo test && whoami", "ls `whoami`"]
-        for cmd in dangerous:
-            with pytest.raises(ValueError, match="dangerous pattern"):
-                sanitize_command(cmd)
+        with pytest.raises(ValueError, match="dangerous pattern"):
+            sanitize_command(cmd)
 
     def test_dangerous_rm_blocked(self) -> None:
         """Test dangerous rm commands are blocked."""
         with pytest.raises(ValueError, match="dangerous pattern"):
             sanitize_command("rm -rf /")
 
-    def test_eval_exec_blocked(self) -> None:
+    @pytest.mark.parametrize("cmd", EVAL_EXEC_COMMANDS)
+    def test_eval_exec_blocked(self, cmd: str) -> None:
         """Test eval/exec are blocked."""
-        dangerous = ["eval 'bad code'", "exec python_code"]
-        for cmd in dangerous:
-            with pytest.raises(ValueError, match="dangerous pattern"):
-                sanitize_command(cmd)
+        with pytest.raises(ValueError, match="dangerous pattern"):
+            sanitize_command(cmd)
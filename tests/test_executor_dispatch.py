@@ -1,164 +1,193 @@
 """Tests for tool dispatcher."""
 from __future__ import annotations
 
+from typing import Iterator
 from unittest.mock import MagicMock, patch
 import pytest
 
-from agent.core.executor.dispatch import ToolDispatcher
+from agent.core.executor import dispatch
+from agent.core.executor.dispatch import RetryCounts, ToolDispatcher
+
+
+@pytest.fixture
+def dispatcher() -> Iterator[ToolDispatcher]:
+    """Dispatcher without a reporter; retry state is cleared after each test."""
+    d = ToolDispatcher()
+    yield d
+    d._retry_counts.clear()
+
+
+@pytest.fixture
+def dispatcher_with_reporter(mock_reporter: MagicMock) -> ToolDispatcher:
+    """Dispatcher wired to the shared mock reporter fixture."""
+    return ToolDispatcher(mock_reporter)
 
 
 class TestToolDispatcher:
     """Test ToolDispatcher class."""
 
-    def test_init(self) -> None:
+    def test_init(self, dispatcher: ToolDispatcher) -> None:
         """Test dispatcher initialization."""
-        dispatcher = ToolDispatcher()
         assert dispatcher.reporter is None
-        assert dispatcher._retry_counts == {}
+        assert len(dispatcher._retry_counts) == 0
 
-    def test_init_with_reporter(self) -> None:
+    def test_init_with_reporter(
+        self, dispatcher_with_reporter: ToolDispatcher, mock_reporter: MagicMock
+    ) -> None:
         """Test dispatcher initialization with reporter."""
-        reporter = MagicMock()
-        dispatcher = ToolDispatcher(reporter)
-        assert dispatcher.reporter is reporter
+        assert dispatcher_with_reporter.reporter is mock_reporter
 
-    def test_invalid_tool(self) -> None:
+    def test_invalid_tool(self, dispatcher: ToolDispatcher) -> None:
         """Test dispatching invalid tool name."""
-        dispatcher = ToolDispatcher()
         result = dispatcher.dispatch("invalid_tool", {})
         assert result.startswith("ERROR:")
         assert "unknown tool" in result
 
-    @patch("agent.core.executor.dispatch.fs_read")
-    def test_fs_read_success(self, mock_read: MagicMock) -> None:
+    @patch.object(dispatch, "fs_read")
+    def test_fs_read_success(self, mock_read: MagicMock, dispatcher: ToolDispatcher) -> None:
         """Test successful file read."""
         mock_result = MagicMock(ok=True, detail="file content")
         mock_read.return_value = mock_result
         
-        dispatcher = ToolDispatcher()
         result = dispatcher.dispatch("fs_read", {"path": "test.py"})
         
         assert result == "file content"
         mock_read.assert_called_once_with("test.py")
 
-    @patch("agent.core.executor.dispatch.fs_read")
-    def test_fs_read_failure(self, mock_read: MagicMock) -> None:
+    @patch.object(dispatch, "fs_read")
+    def test_fs_read_failure(self, mock_read: MagicMock, dispatcher: ToolDispatcher) -> None:
         """Test failed file read."""
         mock_result = MagicMock(ok=False, detail="file not found")
         mock_read.return_value = mock_result
         
-        dispatcher = ToolDispatcher()
         result = dispatcher.dispatch("fs_read", {"path": "missing.py"})
         
         assert result.startswith("ERROR:")
         assert "file not found" in result
 
-    @patch("agent.core.executor.dispatch.fs_write")
-    def test_fs_write_success(self, mock_write: MagicMock) -> None:
+    @patch.object(dispatch, "fs_write")
+    def test_fs_write_success(self, mock_write: MagicMock, dispatcher: ToolDispatcher) -> None:
         """Test successful file write."""
         mock_result = MagicMock(ok=True, detail="wrote test.py")
         mock_write.return_value = mock_result
         
-        dispatcher = ToolDispatcher()
         result = dispatcher.dispatch("fs_write", {"path": "test.py", "content": "print('hi')"})
         
         assert result == "wrote test.py"
         mock_write.assert_called_once_with("test.py", "print('hi')")
 
-    @patch("agent.core.executor.dispatch.fs_list")
-    def test_fs_list_success(self, mock_list: MagicMock) -> None:
+    @patch.object(dispatch, "fs_list")
+    def test_fs_list_success(self, mock_list: MagicMock, dispatcher: ToolDispatcher) -> None:
         """Test successful directory listing."""
         mock_result = MagicMock(ok=True, detail="file1.py\nfile2.py")
         mock_list.return_value = mock_result
         
-        dispatcher = ToolDispatcher()
         result = dispatcher.dispatch("fs_list", {"path": "."})
         
         assert "file1.py" in result
         assert "file2.py" in result
 
-    @patch("agent.core.executor.dispatch.shell_run")
-    def test_shell_run_success(self, mock_run: MagicMock) -> None:
+    @patch.object(dispatch, "shell_run")
+    def test_shell_run_success(self, mock_run: MagicMock, dispatcher: ToolDispatcher) -> None:
         """Test successful shell command."""
         mock_result = MagicMock(ok=True, code=0, stdout="output", stderr="")
         mock_run.return_value = mock_result
         
-        dispatcher = ToolDispatcher()
         result = dispatcher.dispatch("shell_run", {"cmd": "pytest"})
         
         assert "OK (code 0)" in result
         assert "output" in result
 
-    @patch("agent.core.executor.dispatch.shell_run")
-    def test_shell_run_failure(self, mock_run: MagicMock) -> None:
+    @patch.object(dispatch, "shell_run")
+    def test_shell_run_failure(self, mock_run: MagicMock, dispatcher: ToolDispatcher) -> None:
         """Test failed shell command."""
         mock_result = MagicMock(ok=False, code=1, stdout="", stderr="error")
         mock_run.return_value = mock_result
         
-        dispatcher = ToolDispatcher()
         result = dispatcher.dispatch("shell_run", {"cmd": "pytest"})
         
         assert "ERROR (code 1)" in result
         assert "error" in result
 
-    @patch("agent.core.executor.dispatch.python_run")
-    def test_python_run_pytest(self, mock_run: MagicMock) -> None:
+    @patch.object(dispatch, "python_run")
+    def test_python_run_pytest(self, mock_run: MagicMock, dispatcher: ToolDispatcher) -> None:
         """Test pytest execution."""
         mock_result = MagicMock(ok=True, code=0, stdout="test passed", stderr="")
         mock_run.return_value = mock_result
         
-        dispatcher = ToolDispatcher()
         result = dispatcher.dispatch("python_run", {"mode": "pytest"})
         
         assert "OK (code 0)" in result
         assert "test passed" in result
 
-    @patch("agent.core.executor.dispatch.python_run")
-    def test_python_run_snippet(self, mock_run: MagicMock) -> None:
+    @patch.object(dispatch, "python_run")
+    def test_python_run_snippet(self, mock_run: MagicMock, dispatcher: ToolDispatcher) -> None:
         """Test Python snippet execution."""
         mock_result = MagicMock(ok=True, code=0, stdout="42", stderr="")
         mock_run.return_value = mock_result
         
-        dispatcher = ToolDispatcher()
         result = dispatcher.dispatch("python_run", {"mode": "snippet", "code": "print(42)"})
         
         assert "OK (code 0)" in result
         assert "42" in result
 
-    def test_python_run_invalid_mode(self) -> None:
+    def test_python_run_invalid_mode(self, dispatcher: ToolDispatcher) -> None:
         """Test invalid Python mode."""
-        dispatcher = ToolDispatcher()
         result = dispatcher.dispatch("python_run", {"mode": "invalid"})
         
         assert result.startswith("ERROR:")
         assert "Invalid mode" in result
 
-    def test_path_sanitization(self) -> None:
+    def test_path_sanitization(self, dispatcher: ToolDispatcher) -> None:
         """Test path traversal is blocked."""
-        dispatcher = ToolDispatcher()
         result = dispatcher.dispatch("fs_read", {"path": "../etc/passwd"})
         
         assert result.startswith("ERROR:")
         assert "Invalid path" in result
 
-    def test_command_sanitization(self) -> None:
+    def test_command_sanitization(self, dispatcher: ToolDispatcher) -> None:
         """Test dangerous commands are blocked."""
-        dispatcher = ToolDispatcher()
         result = dispatcher.dispatch("shell_run", {"cmd": "rm -rf /"})
         
         assert result.startswith("ERROR:")
         assert "dangerous pattern" in result
 
-    @patch("agent.core.executor.dispatch.fs_read")
-    def test_reporter_callbacks(self, mock_read: MagicMock) -> None:
+    @patch.object(dispatch, "fs_read")
+    def test_reporter_callbacks(
+        self,
+        mock_read: MagicMock,
+        dispatcher_with_reporter: ToolDispatcher,
+        mock_reporter: MagicMock,
+    ) -> None:
         """Test reporter receives callbacks."""
         mock_result = MagicMock(ok=True, detail="content")
         mock_read.return_value = mock_result
-        reporter = MagicMock()
         
-        dispatcher = ToolDispatcher(reporter)
-        dispatcher.dispatch("fs_read", {"path": "test.py"})
+        dispatcher_with_reporter.dispatch("fs_read", {"path": "test.py"})
         
-        reporter.on_tool_call.assert_called_once()
-        reporter.on_file_operation.assert_called_once()
-        reporter.on_tool_result.assert_called_once()
+        mock_reporter.on_tool_call.assert_called_once()
+        mock_reporter.on_file_operation.assert_called_once()
+        mock_reporter.on_tool_result.assert_called_once()
+
+
+class TestRetryCounts:
+    """Test bounded retry counter storage."""
+
+    def test_evicts_least_recently_updated(self) -> None:
+        """Test the oldest key is dropped once the cap is exceeded."""
+        counts = RetryCounts(maxlen=2)
+        counts["a"] = 1
+        counts["b"] = 1
+        counts["a"] = 2
+        counts["c"] = 1
+
+        assert list(counts) == ["a", "c"]
+        assert counts["a"] == 2
+
+    def test_dispatcher_retry_counts_bounded(self, dispatcher: ToolDispatcher) -> None:
+        """Test the dispatcher never tracks more than the cap."""
+        for i in range(dispatcher._retry_counts.maxlen + 10):
+            dispatcher._retry_counts[f"key{i}"] = 1
+
+        assert len(dispatcher._retry_counts) == dispatcher._retry_counts.maxlen
+        assert "key0" not in dispatcher._retry_counts
@@ -11,17 +11,16 @@ from agent.core.executor.formatters import (
     StandardFormatter,
     get_formatter,
 )
-from agent.core.executor.base import get_tool_schema
+from agent.core.executor.base import ToolSchema
 
 
 class TestQwen3Formatter:
     """Test Qwen3 XML formatter."""
 
-    def test_format_tools(self) -> None:
+    def test_format_tools(self, tool_schema: list[ToolSchema]) -> None:
         """Test Qwen3 tool formatting."""
         formatter = Qwen3Formatter()
-        tools = get_tool_schema()
-        result = formatter.format_tools(tools)
+        result = formatter.format_tools(tool_schema)
         
         assert "<tools>" in result
         assert "</tools>" in result
@@ -69,11 +68,10 @@ class TestQwen3Formatter:
 class TestPhi4Formatter:
     """Test Phi-4-mini formatter."""
 
-    def test_format_tools(self) -> None:
+    def test_format_tools(self, tool_schema: list[ToolSchema]) -> None:
         """Test Phi-4 tool formatting."""
         formatter = Phi4Formatter()
-        tools = get_tool_schema()
-        result = formatter.format_tools(tools)
+        result = formatter.format_tools(tool_schema)
         
         assert "<|tool|>" in result
         assert "<|/tool|>" in result
@@ -88,6 +86,27 @@ class TestPhi4Formatter:
         assert len(calls) == 1
         assert calls[0]["function"]["name"] == "fs_read"
 
+    def test_extract_multiple_calls_in_one_array(self) -> None:
+        """Test Phi-4 arrays holding several calls, in both call shapes."""
+        formatter = Phi4Formatter()
+        content = (
+            'Reading first.\n<|tool_call|>[ '
+            '{"type": "function", "function": {"name": "fs_read", "arguments": {"path": "a.py"}}}, '
+            '{"name": "fs_write", "arguments": {"path": "b.py", "content": "x = [1]"}} ] done'
+        )
+
+        calls = formatter.extract_calls(content)
+        assert [c["function"]["name"] for c in calls] == ["fs_read", "fs_write"]
+        assert calls[1]["function"]["arguments"]["content"] == "x = [1]"
+
+    def test_extract_invalid_json(self) -> None:
+        """Test handling invalid JSON in Phi-4 format."""
+        formatter = Phi4Formatter()
+        content = '<|tool_call|>[{invalid json}] <|tool_call|>[ {"name": "fs_list", "arguments": {}} ]'
+
+        calls = formatter.extract_calls(content)
+        assert [c["function"]["name"] for c in calls] == ["fs_list"]
+
     def test_system_prompt(self) -> None:
         """Test Phi-4 system prompt generation."""
         formatter = Phi4Formatter()
@@ -100,11 +119,10 @@ class TestPhi4Formatter:
 class TestGranite4Formatter:
     """Test Granite4 IBM formatter."""
 
-    def test_format_tools(self) -> None:
+    def test_format_tools(self, tool_schema: list[ToolSchema]) -> None:
         """Test Granite4 tool formatting."""
         formatter = Granite4Formatter()
-        tools = get_tool_schema()
-        result = formatter.format_tools(tools)
+        result = formatter.format_tools(tool_schema)
         
         assert "fs_read" in result
         assert "path=<string>" in result
@@ -129,6 +147,38 @@ class TestGranite4Formatter:
         assert calls[0]["function"]["arguments"]["path"] == "test.py"
         assert calls[0]["function"]["arguments"]["content"] == "print(42)"
 
+    def test_extract_quoted_brackets_and_escapes(self) -> None:
+        """Test Granite4 values may contain )], commas and escapes."""
+        formatter = Granite4Formatter()
+        content = '[fs_write(path="a.py", content="x = f(a[0])]\\n", note=\'it\\\'s, ok\')]'
+
+        calls = formatter.extract_calls(content)
+        assert len(calls) == 1
+        assert calls[0]["function"]["arguments"] == {
+            "path": "a.py",
+            "content": "x = f(a[0])]\n",
+            "note": "it's, ok",
+        }
+
+    def test_extract_mixed_text_and_calls(self) -> None:
+        """Test Granite4 calls surrounded by prose and unterminated input."""
+        formatter = Granite4Formatter()
+        content = 'See [docs] then [fs_read(path=test.py)] and [fs_list(path=".")] [fs_read(path="x'
+
+        calls = formatter.extract_calls(content)
+        assert [c["function"]["name"] for c in calls] == ["fs_read", "fs_list"]
+        assert calls[0]["function"]["arguments"] == {"path": "test.py"}
+
+    def test_extract_after_malformed_call(self) -> None:
+        """Test a malformed Granite4 call doesn't swallow the next valid one."""
+        formatter = Granite4Formatter()
+        content = '[fs_read(path "a.py" [fs_list(path=".")] [fs_read(oops)]'
+
+        calls = formatter.extract_calls(content)
+        assert [c["function"]["name"] for c in calls] == ["fs_list", "fs_read"]
+        assert calls[0]["function"]["arguments"] == {"path": "."}
+        assert calls[1]["function"]["arguments"] == {}
+
     def test_system_prompt(self) -> None:
         """Test Granite4 system prompt generation."""
         formatter = Granite4Formatter()
@@ -141,11 +191,10 @@ class TestGranite4Formatter:
 class TestStandardFormatter:
     """Test standard OpenAI formatter."""
 
-    def test_format_tools(self) -> None:
+    def test_format_tools(self, tool_schema: list[ToolSchema]) -> None:
         """Test standard tool formatting."""
         formatter = StandardFormatter()
-        tools = get_tool_schema()
-        result = formatter.format_tools(tools)
+        result = formatter.format_tools(tool_schema)
         
         parsed = json.loads(result)
         assert len(parsed) == 5
@@ -167,6 +216,23 @@ class TestStandardFormatter:
         calls = formatter.extract_calls(content)
         assert len(calls) == 1
 
+    def test_extract_braces_inside_strings(self) -> None:
+        """Test braces inside argument strings do not end the object early."""
+        formatter = StandardFormatter()
+        content = '```\n{"name": "fs_write", "arguments": {"path": "a.py", "content": "d = {}\\n"}}\n```'
+
+        calls = formatter.extract_calls(content)
+        assert len(calls) == 1
+        assert calls[0]["function"]["arguments"]["content"] == "d = {}\n"
+
+    def test_extract_non_tool_json(self) -> None:
+        """Test JSON without name/arguments and invalid JSON yield no calls."""
+        formatter = StandardFormatter()
+
+        assert formatter.extract_calls('{"result": 42}') == []
+        assert formatter.extract_calls('{"name": "fs_read", ') == []
+        assert formatter.extract_calls("no json here") == []
+
     def test_system_prompt(self) -> None:
         """Test standard system prompt generation."""
         formatter = StandardFormatter()
@@ -179,27 +245,20 @@ class TestStandardFormatter:
 class TestGetFormatter:
     """Test formatter selection."""
 
-    def test_qwen3_detection(self) -> None:
-        """Test Qwen3 model detection."""
-        formatter = get_formatter("qwen3-7b")
-        assert isinstance(formatter, Qwen3Formatter)
-
-    def test_phi4_detection(self) -> None:
-        """Test Phi-4 model detection."""
-        formatter = get_formatter("phi4-mini")
-        assert isinstance(formatter, Phi4Formatter)
-
-    def test_granite4_detection(self) -> None:
-        """Test Granite4 model detection."""
-        formatter = get_formatter("granite4-8b")
-        assert isinstance(formatter, Granite4Formatter)
-
-    def test_standard_fallback(self) -> None:
-        """Test fallback to standard formatter."""
-        formatter = get_formatter("gpt-4")
-        assert isinstance(formatter, StandardFormatter)
-
-    def test_case_insensitive(self) -> None:
-        """Test case-insensitive model detection."""
-        formatter = get_formatter("QWEN3-7B")
-        assert isinstance(formatter, Qwen3Formatter)
+    @pytest.mark.parametrize(
+        "model_name, formatter_cls",
+        [
+            ("qwen3-7b", Qwen3Formatter),
+            ("QWEN3-7B", Qwen3Formatter),
+            ("phi4-mini", Phi4Formatter),
+            ("granite4-8b", Granite4Formatter),
+            ("gpt-4", StandardFormatter),
+        ],
+    )
+    def test_formatter_dispatch(self, model_name: str, formatter_cls: type) -> None:
+        """Test model-name detection, case-insensitivity and standard fallback."""
+        assert isinstance(get_formatter(model_name), formatter_cls)
+
+    def test_instances_are_shared(self) -> None:
+        """Test formatters are cached per case-insensitive model name."""
+        assert get_formatter("qwen3-7b") is get_formatter("QWEN3-7B")
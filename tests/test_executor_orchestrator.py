@@ -1,47 +1,74 @@
 """Tests for executor orchestrator."""
 from __future__ import annotations
 
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterator
 from unittest.mock import MagicMock, patch
 import pytest
 
-from agent.core.executor.orchestrator import execute, _has_tool_results
-from agent.core.executor.base import ExecSummary
+from agent.core.executor import orchestrator
+from agent.core.executor.orchestrator import execute, _dispatch_calls, _has_tool_results
+from agent.core.executor.base import ExecSummary, MessageLog
+
+
+@dataclass
+class FakeResponse:
+    """Plain stand-in for a backend chat response chunk."""
+
+    content: str
+    tool_calls: list[dict[str, Any]]
+    done: bool
+
+
+@dataclass
+class FakeSettings:
+    """Plain stand-in for the Settings fields execute() reads."""
+
+    backend: str
+    coder_model: str
+    max_steps: int
+
+
+class FakeBackend:
+    """Backend stub that streams one scripted turn per chat() call."""
+
+    def __init__(self, turns: list[list[FakeResponse]]) -> None:
+        self._turns = iter(turns)
+        self.last_messages: list[dict[str, Any]] = []
+
+    def chat(self, messages: list[dict[str, Any]], *args: Any, **kwargs: Any) -> Iterator[FakeResponse]:
+        self.last_messages = messages
+        yield from next(self._turns)
+
+
+@pytest.fixture
+def settings() -> Iterator[FakeSettings]:
+    """Settings returned by load_settings(); tests may adjust max_steps."""
+    s = FakeSettings(backend="test", coder_model="test-model", max_steps=3)
+    with patch.object(orchestrator, "load_settings", return_value=s):
+        yield s
 
 
 class TestExecuteFunction:
     """Test main execute function."""
 
-    @patch("agent.core.executor.orchestrator.get_backend")
-    @patch("agent.core.executor.orchestrator.load_settings")
-    def test_basic_execution(self, mock_settings: MagicMock, mock_backend: MagicMock) -> None:
+    @patch.object(orchestrator, "get_backend")
+    def test_basic_execution(self, mock_backend: MagicMock, settings: FakeSettings) -> None:
         """Test basic execution flow."""
-        # Mock settings
-        settings = MagicMock()
-        settings.backend = "test"
-        settings.coder_model = "test-model"
-        settings.max_steps = 3
-        mock_settings.return_value = settings
-        
         # Mock backend response (no tool calls, immediate exit)
-        response = MagicMock(content="Done", tool_calls=[], done=True)
-        backend = MagicMock()
-        backend.chat.return_value = [response]
-        mock_backend.return_value = backend
+        response = FakeResponse("Done", [], True)
+        mock_backend.return_value = FakeBackend([[response]])
         
         result = execute("test prompt")
         
         assert isinstance(result, ExecSummary)
         assert result.last == "Done"
 
-    @patch("agent.core.executor.orchestrator.get_backend")
-    @patch("agent.core.executor.orchestrator.load_settings")
-    def test_with_tool_calls(self, mock_settings: MagicMock, mock_backend: MagicMock) -> None:
+    @patch.object(orchestrator, "get_backend")
+    def test_with_tool_calls(self, mock_backend: MagicMock, settings: FakeSettings) -> None:
         """Test execution with tool calls."""
-        settings = MagicMock()
-        settings.backend = "test"
-        settings.coder_model = "test-model"
         settings.max_steps = 5
-        mock_settings.return_value = settings
         
         # First response with tool call
         tool_call = {
@@ -50,16 +77,14 @@ class TestExecuteFunction:
                 "arguments": {"path": "test.py"},
             }
         }
-        response1 = MagicMock(content="", tool_calls=[tool_call], done=True)
+        response1 = FakeResponse("", [tool_call], True)
         
         # Second response without tool calls (exit)
-        response2 = MagicMock(content="Completed", tool_calls=[], done=True)
+        response2 = FakeResponse("Completed", [], True)
         
-        backend = MagicMock()
-        backend.chat.side_effect = [[response1], [response2]]
-        mock_backend.return_value = backend
+        mock_backend.return_value = FakeBackend([[response1], [response2]])
         
-        with patch("agent.core.executor.orchestrator.ToolDispatcher") as mock_dispatcher_class:
+        with patch.object(orchestrator, "ToolDispatcher") as mock_dispatcher_class:
             mock_dispatcher = MagicMock()
             mock_dispatcher.dispatch.return_value = "file content"
             mock_dispatcher._retry_counts = {}
@@ -71,25 +96,18 @@ class TestExecuteFunction:
             assert result.last == "Completed"
             mock_dispatcher.dispatch.assert_called_once_with("fs_read", {"path": "test.py"})
 
-    @patch("agent.core.executor.orchestrator.get_backend")
-    @patch("agent.core.executor.orchestrator.load_settings")
-    def test_max_steps_limit(self, mock_settings: MagicMock, mock_backend: MagicMock) -> None:
+    @patch.object(orchestrator, "get_backend")
+    def test_max_steps_limit(self, mock_backend: MagicMock, settings: FakeSettings) -> None:
         """Test execution respects max_steps limit."""
-        settings = MagicMock()
-        settings.backend = "test"
-        settings.coder_model = "test-model"
         settings.max_steps = 2
-        mock_settings.return_value = settings
         
         # Always return tool calls to hit max_steps
         tool_call = {"function": {"name": "fs_read", "arguments": {"path": "test.py"}}}
-        response = MagicMock(content="", tool_calls=[tool_call], done=True)
+        response = FakeResponse("", [tool_call], True)
         
-        backend = MagicMock()
-        backend.chat.return_value = [response]
-        mock_backend.return_value = backend
+        mock_backend.return_value = FakeBackend([[response]] * settings.max_steps)
         
-        with patch("agent.core.executor.orchestrator.ToolDispatcher") as mock_dispatcher_class:
+        with patch.object(orchestrator, "ToolDispatcher") as mock_dispatcher_class:
             mock_dispatcher = MagicMock()
             mock_dispatcher.dispatch.return_value = "content"
             mock_dispatcher._retry_counts = {}
@@ -99,26 +117,19 @@ class TestExecuteFunction:
             
             assert result.steps == 2  # Hit max_steps
 
-    @patch("agent.core.executor.orchestrator.get_backend")
-    @patch("agent.core.executor.orchestrator.load_settings")
-    def test_error_retry(self, mock_settings: MagicMock, mock_backend: MagicMock) -> None:
+    @patch.object(orchestrator, "get_backend")
+    def test_error_retry(self, mock_backend: MagicMock, settings: FakeSettings) -> None:
         """Test error retry logic."""
-        settings = MagicMock()
-        settings.backend = "test"
-        settings.coder_model = "test-model"
         settings.max_steps = 5
-        mock_settings.return_value = settings
         
         # Tool call that will error
         tool_call = {"function": {"name": "fs_read", "arguments": {"path": "missing.py"}}}
-        response1 = MagicMock(content="", tool_calls=[tool_call], done=True)
-        response2 = MagicMock(content="Fixed", tool_calls=[], done=True)
+        response1 = FakeResponse("", [tool_call], True)
+        response2 = FakeResponse("Fixed", [], True)
         
-        backend = MagicMock()
-        backend.chat.side_effect = [[response1], [response2]]
-        mock_backend.return_value = backend
+        mock_backend.return_value = FakeBackend([[response1], [response2]])
         
-        with patch("agent.core.executor.orchestrator.ToolDispatcher") as mock_dispatcher_class:
+        with patch.object(orchestrator, "ToolDispatcher") as mock_dispatcher_class:
             mock_dispatcher = MagicMock()
             mock_dispatcher.dispatch.return_value = "ERROR: file not found"
             mock_dispatcher._retry_counts = {}
@@ -129,15 +140,9 @@ class TestExecuteFunction:
             # Should have triggered retry
             assert result.steps >= 2
 
-    @patch("agent.core.executor.orchestrator.get_backend")
-    @patch("agent.core.executor.orchestrator.load_settings")
-    def test_backend_failure(self, mock_settings: MagicMock, mock_backend: MagicMock) -> None:
+    @patch.object(orchestrator, "get_backend")
+    def test_backend_failure(self, mock_backend: MagicMock, settings: FakeSettings) -> None:
         """Test handling of backend failures."""
-        settings = MagicMock()
-        settings.backend = "test"
-        settings.coder_model = "test-model"
-        settings.max_steps = 3
-        mock_settings.return_value = settings
         
         backend = MagicMock()
         backend.chat.side_effect = Exception("Backend error")
@@ -146,24 +151,16 @@ class TestExecuteFunction:
         with pytest.raises(RuntimeError, match="Backend execution failed"):
             execute("test")
 
-    @patch("agent.core.executor.orchestrator.get_backend")
-    @patch("agent.core.executor.orchestrator.load_settings")
-    def test_streaming(self, mock_settings: MagicMock, mock_backend: MagicMock) -> None:
+    @patch.object(orchestrator, "get_backend")
+    def test_streaming(self, mock_backend: MagicMock, settings: FakeSettings) -> None:
         """Test streaming with reporter."""
-        settings = MagicMock()
-        settings.backend = "test"
-        settings.coder_model = "test-model"
-        settings.max_steps = 3
-        mock_settings.return_value = settings
         
         # Streaming responses
-        chunk1 = MagicMock(content="chunk1", tool_calls=[], done=False)
-        chunk2 = MagicMock(content="chunk2", tool_calls=[], done=False)
-        final = MagicMock(content="", tool_calls=[], done=True)
+        chunk1 = FakeResponse("chunk1", [], False)
+        chunk2 = FakeResponse("chunk2", [], False)
+        final = FakeResponse("", [], True)
         
-        backend = MagicMock()
-        backend.chat.return_value = [chunk1, chunk2, final]
-        mock_backend.return_value = backend
+        mock_backend.return_value = FakeBackend([[chunk1, chunk2, final]])
         
         reporter = MagicMock()
         result = execute("test", reporter=reporter)
@@ -172,6 +169,96 @@ class TestExecuteFunction:
         assert reporter.on_llm_chunk.call_count == 2
 
 
+class TestDispatchCalls:
+    """Test _dispatch_calls ordering and concurrency."""
+
+    def test_read_only_calls_run_concurrently(self) -> None:
+        """Test several read-only calls are dispatched on worker threads at once."""
+        barrier = threading.Barrier(2, timeout=5)
+        dispatcher = MagicMock(reporter=None)
+
+        def dispatch(name: str, args: dict[str, Any]) -> str:
+            barrier.wait()  # Only passes if both calls are in flight together
+            return f"{name}:{args['path']}"
+
+        dispatcher.dispatch.side_effect = dispatch
+        calls = [("fs_read", {"path": "a.py"}), ("fs_list", {"path": "."})]
+
+        results = list(_dispatch_calls(dispatcher, calls))
+
+        assert results == ["fs_read:a.py", "fs_list:."]
+
+    def test_side_effect_calls_run_in_order_on_caller_thread(self) -> None:
+        """Test batches containing writes stay sequential and lazy."""
+        threads: list[int] = []
+        dispatcher = MagicMock()
+
+        def dispatch(name: str, args: dict[str, Any]) -> str:
+            threads.append(threading.get_ident())
+            return "ERROR: boom" if name == "fs_write" else "ok"
+
+        dispatcher.dispatch.side_effect = dispatch
+        calls = [("fs_read", {"path": "a.py"}), ("fs_write", {"path": "b.py"}), ("fs_read", {"path": "c.py"})]
+
+        results = _dispatch_calls(dispatcher, calls)
+        assert next(iter(results)) == "ok"
+
+        assert dispatcher.dispatch.call_count == 1
+        assert threads == [threading.get_ident()]
+
+    def test_parallel_reports_replay_in_call_order(self) -> None:
+        """Test worker-thread reporter callbacks reach the reporter in call order."""
+        second_reported = threading.Event()
+        reporter = MagicMock()
+        reporter_threads: list[int] = []
+        reporter.on_tool_call.side_effect = lambda *_: reporter_threads.append(threading.get_ident())
+        dispatcher = MagicMock(reporter=reporter)
+
+        def worker(buffer: Any) -> MagicMock:
+            def dispatch(name: str, args: dict[str, Any]) -> str:
+                if args["path"] == "a.py":
+                    second_reported.wait(timeout=5)  # a.py reports after b.py
+                buffer.on_tool_call(name, args)
+                if args["path"] == "b.py":
+                    second_reported.set()
+                return "ok"
+            return MagicMock(dispatch=dispatch)
+
+        dispatcher.with_reporter.side_effect = worker
+        calls = [("fs_read", {"path": "a.py"}), ("fs_read", {"path": "b.py"})]
+
+        assert _dispatch_calls(dispatcher, calls) == ["ok", "ok"]
+        assert [c.args[1]["path"] for c in reporter.on_tool_call.call_args_list] == ["a.py", "b.py"]
+        assert reporter_threads == [threading.get_ident()] * 2
+
+    @patch.object(orchestrator, "get_backend")
+    def test_parallel_tool_calls_keep_message_order(
+        self, mock_backend: MagicMock, settings: FakeSettings
+    ) -> None:
+        """Test tool results are appended in call order after a parallel batch."""
+        calls = [
+            {"function": {"name": "fs_read", "arguments": {"path": "a.py"}}},
+            {"function": {"name": "fs_read", "arguments": {"path": "b.py"}}},
+        ]
+        backend = FakeBackend([
+            [FakeResponse("", calls, True)],
+            [FakeResponse("Done", [], True)],
+        ])
+        mock_backend.return_value = backend
+
+        with patch.object(orchestrator, "ToolDispatcher") as mock_dispatcher_class:
+            mock_dispatcher = MagicMock(reporter=None)
+            mock_dispatcher.dispatch.side_effect = lambda name, args: f"content of {args['path']}"
+            mock_dispatcher._retry_counts = {}
+            mock_dispatcher_class.return_value = mock_dispatcher
+
+            result = execute("read two files")
+
+        tool_messages = [m["content"] for m in backend.last_messages if m["role"] == "tool"]
+        assert tool_messages == ["content of a.py", "content of b.py"]
+        assert result.last == "Done"
+
+
 class TestHasToolResults:
     """Test _has_tool_results helper."""
 
@@ -207,13 +294,37 @@ class TestHasToolResults:
         ]
         assert _has_tool_results(messages)
 
-    def test_only_checks_last_three(self) -> None:
+    @pytest.mark.parametrize("container", [list, MessageLog])
+    def test_only_checks_last_three(self, container: type) -> None:
         """Test only last 3 messages are checked."""
+        messages = container()
+        messages.append({"role": "tool", "content": "old result"})
+        for i in range(1, 5):
+            messages.append({"role": "user", "content": f"test{i}"})
+        assert not _has_tool_results(messages)
+
+    def test_message_log_rolls_window(self) -> None:
+        """Test a MessageLog tool result ages out after 3 further appends."""
+        log = MessageLog([{"role": "user", "content": "task"}])
+        assert not _has_tool_results(log)
+
+        log.append({"role": "assistant", "content": "OK (code 0)"})
+        for i in range(2):
+            log.append({"role": "user", "content": f"next{i}"})
+            assert _has_tool_results(log)
+        log.append({"role": "user", "content": "next2"})
+        assert not _has_tool_results(log)
+
+    def test_third_from_last_is_checked(self) -> None:
+        """Test the oldest message of the last 3 is still checked."""
         messages = [
-            {"role": "tool", "content": "old result"},
             {"role": "user", "content": "test1"},
+            {"role": "tool", "content": "result"},
             {"role": "user", "content": "test2"},
             {"role": "user", "content": "test3"},
-            {"role": "user", "content": "test4"},
         ]
-        assert not _has_tool_results(messages)
+        assert _has_tool_results(messages)
+
+    def test_empty_messages(self) -> None:
+        """Test empty message history."""
+        assert not _has_tool_results([])